@@ -1,53 +1,207 @@
-import csv
+import argparse
+import asyncio
 import datetime
 import json
 import os
-import sys
+import tempfile
 
 import httpx
+from httpx_retries import Retry, RetryTransport
+
+from farm_pagination import iter_farms
+from http_cache import CachingTransport
+from json_stream import aiter_json_array
+from scheduler import RequestScheduler, SchedulingTransport
+from table_writer import OUTPUT_FORMATS, open_table
+from token_cache import TokenAuth
+
+"""
+Writes the anomalies of one or more inspections to CSV.
+
+> python create_anomaly_csv.py <inspection_id> [<inspection_id> ...]
+> python create_anomaly_csv.py --all-latest
+
+--all-latest exports the latest inspection of every farm in the org. Each
+inspection gets its own CSV unless --combined is given, in which case all rows
+go into one CSV with an inspection_id column; an inspection that fails to
+download adds no rows to it, and is listed at the end of the run. Everything runs in one process
+with one token, and anomalies are fetched concurrently over one pooled client.
+
+Nested objects in an anomaly are written as dotted columns (tag.tag,
+anomaly_life_cycle.status, ...). Every file starts with the same columns, and any
+other field in the response is added after them, so an anomaly with extra
+fields never stops a CSV export and an inspection without anomalies still gets a
+header. Parquet and Arrow files fix their columns with the first row group
+(RM_ROW_GROUP_SIZE anomalies); a field first seen after that stops the export
+with an error rather than being dropped.
+
+--format parquet or --format arrow writes typed columns instead of CSV (needs
+pyarrow, see table_writer.py).
+"""
 
 base_url = "https://api.raptormaps.com"
 current = datetime.datetime.now()
-inspection_id: int = sys.argv[1]
+timeout = httpx.Timeout(timeout=10, read=600.0, pool=180.0)
+
+retry = Retry(total=5, backoff_factor=0.75)
 
+# Leading columns of every export, after flattening. Other fields follow them in
+# the order they first appear.
+anomaly_columns = ['id', 'tag.tag', 'anomaly_life_cycle.status', 'created_tsecs',
+                   'custom_locator_text', 'priority']
+anomaly_column_types = {
+    'inspection_id': 'int64',
+    'id': 'int64',
+    'tag.tag': 'string',
+    'anomaly_life_cycle.status': 'string',
+    'created_tsecs': 'float64',  # the API can return fractional seconds
+    'custom_locator_text': 'string',
+    'priority': 'int64',
+}
 
-def get_bearer_token():
+
+def get_token_auth():
+    # Sets a current token on every request, so a long export outlives the first one
     client_secret = os.environ["DEMO_CLIENT_SECRET"]
     client_id = os.environ["DEMO_CLIENT_ID"]
-    headers = {"content-type": "application/json"}
-    url = f"{base_url}/oauth/token"
-    body = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "audience": "api://customer-api"
-    }
-
-    token_response = httpx.post(url, headers=headers, data=json.dumps(body))
 
-    response_data = token_response.json()
-    return response_data.get("access_token")
+    return TokenAuth(client_id, client_secret)
 
 
-token: str = get_bearer_token()
-org_id: int = os.environ.get('DEMO_ORG_ID')
+# Defects are parsed one at a time as the response streams in (see json_stream.py),
+# so each one can be written before the next has arrived. no-store keeps the
+# response cache from reading the whole body before we see it.
 
 
-def get_anomaly_data(inspection_id):
-    headers = {'Authorization': f'Bearer {token}'}
-    anomalies = httpx.get(
+async def get_anomaly_data(inspection_id, client, org_id):
+    async with client.stream(
+        'GET',
         f'{base_url}/v2/solar_inspections/{inspection_id}/anomalies?org_id={org_id}',
-        headers=headers
+        headers={'Cache-Control': 'no-store'},
+        timeout=timeout
+    ) as res:
+        res.raise_for_status()
+        async for item in aiter_json_array(res, 'defects'):
+            yield item
+
+
+# Used by --all-latest: the most recently updated inspection of each farm, or
+# None if the farm has no inspections.
+
+
+async def get_latest_inspection_id(farm_id, client, org_id):
+    res = await client.get(
+        f'{base_url}/v2/solar_farms/{farm_id}/solar_inspections?org_id={org_id}',
+        timeout=timeout
     )
+    res.raise_for_status()
+    inspections = res.json()
+    if not inspections:
+        return None
+    return max(inspections, key=lambda x: x['updated_tsecs'])['id']
+
+
+async def get_all_latest_inspection_ids(client, org_id):
+    pending = []
+    async for farm in iter_farms(client, org_id):
+        pending.append(asyncio.create_task(
+            get_latest_inspection_id(farm['id'], client, org_id)))
+    return [inspection_id for inspection_id in await asyncio.gather(*pending)
+            if inspection_id is not None]
+
+
+# Rows are flattened and written straight from the stream. If an anomaly brings a
+# field no earlier one had, the CSV gets the new column when it is closed (see
+# table_writer.py). A CSV whose export fails is left as a .part file.
+
+
+def open_anomaly_table(file_stem, output_format, fieldnames):
+    return open_table(file_stem, output_format, fieldnames, anomaly_column_types,
+                      flatten=True, extra_columns=True)
+
+
+# At most RM_MAX_IN_FLIGHT inspections are exported at once, the most the scheduler
+# (see scheduler.py) would let through anyway, so an org with thousands of
+# inspections does not open thousands of output files. Rows are written as they
+# stream in, and a failed inspection does not stop the others. With --combined each
+# inspection is spooled to a temporary file as JSON lines and only copied into the
+# shared file once it has been read in full, so a failed inspection adds no rows
+# to it and no inspection is held in memory.
+
+
+async def export_anomalies(inspection_ids, all_latest=False, combined=False, output_format='csv'):
+    org_id = os.environ.get('DEMO_ORG_ID')
+    scheduler = RequestScheduler()
+    transport = CachingTransport(RetryTransport(
+        transport=SchedulingTransport(scheduler), retry=retry))
+    export_slots = asyncio.Semaphore(scheduler.max_in_flight)
+    async with httpx.AsyncClient(transport=transport, auth=get_token_auth()) as client:
+        inspection_ids = list(inspection_ids)
+        if all_latest:
+            inspection_ids += await get_all_latest_inspection_ids(client, org_id)
+        inspection_ids = list(dict.fromkeys(inspection_ids))
+        print(f'Exporting anomalies for {len(inspection_ids)} inspection(s)')
+
+        combined_table = None
+        if combined:
+            combined_table = open_anomaly_table(
+                f'anamolies_for_{len(inspection_ids)}_inspections_{current}', output_format,
+                ['inspection_id'] + anomaly_columns)
+
+        async def export(inspection_id):
+            async with export_slots:
+                await export_inspection(inspection_id)
+
+        async def export_inspection(inspection_id):
+            if combined_table is not None:
+                with tempfile.TemporaryFile('w+') as spool:
+                    async for item in get_anomaly_data(inspection_id, client, org_id):
+                        spool.write(json.dumps(item) + '\n')
+                    spool.seek(0)
+                    for line in spool:
+                        combined_table.write({'inspection_id': inspection_id, **json.loads(line)})
+                return
+            with open_anomaly_table(f'anamolies_for_inspection_{inspection_id}_{current}',
+                                    output_format, anomaly_columns) as output:
+                async for item in get_anomaly_data(inspection_id, client, org_id):
+                    output.write(item)
+            if not output.rows:
+                print(f'Inspection {inspection_id} has no anomalies, wrote the header only')
+
+        try:
+            results = await asyncio.gather(*(export(i) for i in inspection_ids), return_exceptions=True)
+        except BaseException:
+            if combined_table is not None:
+                combined_table.close(completed=False)
+            raise
+        if combined_table is not None:
+            combined_table.close()
+    failures = [(inspection_id, result) for inspection_id, result in zip(inspection_ids, results)
+                if isinstance(result, BaseException)]
+
+    for inspection_id, error in failures:
+        print(f'Could not export anomalies for inspection {inspection_id}: {error!r}')
+    print(f'Exported {len(inspection_ids) - len(failures)} of {len(inspection_ids)} inspection(s)')
+    return not failures
 
-    return anomalies.json()['defects']
 
+def main():
+    parser = argparse.ArgumentParser(description='Write inspection anomalies to CSV')
+    parser.add_argument('inspection_ids', nargs='*', type=int, metavar='inspection_id',
+                        help='Inspection(s) to export')
+    parser.add_argument('--all-latest', action='store_true',
+                        help='Also export the latest inspection of every farm in the org')
+    parser.add_argument('--combined', action='store_true',
+                        help='Write all inspections to one CSV with an inspection_id column')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help='Output format; parquet and arrow need pyarrow (default: csv)')
+    args = parser.parse_args()
+    if not args.inspection_ids and not args.all_latest:
+        parser.error('give at least one inspection_id, or --all-latest')
 
-anomalies_list: list[dict] = get_anomaly_data(inspection_id)
+    ok = asyncio.run(export_anomalies(args.inspection_ids, args.all_latest, args.combined, args.format))
+    return 0 if ok else 1
 
-with open(f'anamolies_for_inspection_{inspection_id}_{current}.csv', 'w', newline='') as newcsv:
-    fieldnames = anomalies_list[0].keys()
-    writer = csv.DictWriter(newcsv, fieldnames=fieldnames)
 
-    writer.writeheader()
-    for item in anomalies_list:
-        writer.writerow(item)
+if __name__ == "__main__":
+    raise SystemExit(main())
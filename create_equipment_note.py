@@ -8,19 +8,57 @@ is associated to the note.
 This script requires specifying the solar farm id and the equipment id.
 Example:
 > python create_equipment_note.py
+
+Batch mode creates many notes from a manifest in one run:
+> python create_equipment_note.py --manifest notes.csv
+
+The manifest is a CSV with the columns solar_farm_id, object_id, title, body
+and files (file paths separated by ';'), or a JSON Lines file with the same
+keys and files as a list. All files share one upload session; notes, S3 links
+and uploads run concurrently, bounded by --max-notes and --max-uploads. A note
+is only created once all of its files have uploaded, so a failed upload leaves
+no empty note behind and the row can simply be run again.
 """
 
 __copyright__ = "Raptor Maps Inc. 2023 (c)"
 
+import argparse
+import asyncio
+import csv
 import json
 import os
 
 import httpx
 
+from scheduler import RequestScheduler, SchedulingTransport
+from token_cache import get_token
+
 RM_API = 'https://api.raptormaps.com'
 
+# Batch mode: notes worked on at once, and S3 uploads in flight at once
+DEFAULT_MAX_NOTES = 16
+DEFAULT_MAX_UPLOADS = 8
 
-def main():
+TIMEOUT = httpx.Timeout(timeout=30, read=120.0, pool=180.0)
+
+
+def get_bearer_token(client_secret, client_id):
+    # Tokens are cached on disk and shared with the other example scripts
+    return get_token(client_id, client_secret)
+
+
+def get_api_access_token():
+    # Use RM_API_TOKEN if set, otherwise get one with the client credentials.
+    # See here for more info: https://docs.raptormaps.com/reference/reference-getting-started
+    # The token cache renews the token before it expires, so ask for it before
+    # each request instead of keeping the result.
+    api_access_token = os.environ.get('RM_API_TOKEN')
+    if api_access_token:
+        return api_access_token
+    return get_bearer_token(os.environ['RM_CLIENT_SECRET'], os.environ['RM_CLIENT_ID'])
+
+
+def create_single_note():
 
     # INPUTS: change these!
     solar_farm_id = 123
@@ -30,42 +68,12 @@ def main():
     filepath = '/path/to/your/file/here.jpg'
 
     # API Authentication:
-    # Set API token from environment variables
-    api_access_token: str | None = os.environ.get('RM_API_TOKEN')
+    # Use the API token from the environment, or get one with the client credentials.
+    api_access_token = get_api_access_token()
 
     # Set org id which can be found at https://app.raptormaps.com/account
     org_id = os.environ.get('RM_ORG_ID')
 
-    def get_bearer_token(client_secret, client_id):
-        url = f'{RM_API}/oauth/token'
-        headers = {'content-type': 'application/json'}
-        body = {
-            'client_id': client_id,
-            'client_secret': client_secret,
-            'audience': 'api://customer-api'}
-
-        token_response = httpx.post(
-            url,
-            headers=headers,
-            data=json.dumps(body))
-
-        response_data = token_response.json()
-        if token_response.status_code == 200:
-            return response_data.get('access_token')
-        else:
-            raise Exception(
-                f"Error getting bearer token: {response_data}")
-
-    # If you do not already have an API token, this code snippet will get one using the function above.
-    # The access token will be temporarily set in the environment.
-    # See here for more info: https://docs.raptormaps.com/reference/reference-getting-started
-    if not api_access_token:
-        client_id = os.environ['RM_CLIENT_ID']
-        client_secret = os.environ['RM_CLIENT_SECRET']
-        api_access_token = get_bearer_token(client_secret, client_id)
-
-        os.environ['RM_API_TOKEN'] = api_access_token
-
     # Get information about the file to upload
     filename = os.path.basename(filepath)
     filesize = os.path.getsize(filepath)  # in bytes
@@ -152,5 +160,128 @@ def main():
         print('Error: Note files status code: {note_files_resp.status_code}')
 
 
+# Batch mode: read the manifest into one dict per note
+
+
+def read_manifest(path):
+    notes = []
+    with open(path, newline='') as f:
+        if path.endswith('.jsonl'):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            files = row.get('files') or []
+            if isinstance(files, str):
+                files = [p.strip() for p in files.split(';') if p.strip()]
+            notes.append({
+                'solar_farm_id': int(row['solar_farm_id']),
+                'object_id': int(row['object_id']),
+                'title': row['title'],
+                'body': row.get('body', ''),
+                'files': files,
+            })
+    # Fail before creating anything if a file is missing
+    for note in notes:
+        for filepath in note['files']:
+            if not os.path.isfile(filepath):
+                raise FileNotFoundError(f'{filepath} (note "{note["title"]}")')
+    return notes
+
+
+async def post_json(client, url, payload):
+    # Only Raptor Maps API calls carry the token, never the S3 uploads
+    res = await client.post(url, json=payload, headers={'Authorization': f'Bearer {get_api_access_token()}'})
+    res.raise_for_status()
+    return res.json()
+
+
+async def upload_note_file(client, org_id, upload_session_id, filepath, upload_slots):
+    # Create cloud storage location for the file, then upload it
+    filename = os.path.basename(filepath)
+    s3_link = await post_json(client, f'{RM_API}/v2/feature_upload_session/s3_link?org_id={org_id}', {
+        'upload_session_id': upload_session_id,
+        'filename': filename,
+        'filesize': os.path.getsize(filepath),
+    })
+    s3_post = s3_link.get('post')
+    async with upload_slots:
+        with open(filepath, 'rb') as f:
+            s3_post_resp = await client.post(
+                url=s3_post['url'],
+                data=s3_post['fields'],
+                files={'file': (filename, f)},
+            )
+    # Status code 204 indicates a successful upload
+    if s3_post_resp.status_code not in (200, 201, 204):
+        s3_post_resp.raise_for_status()
+    return {'file_id': s3_link.get('file_id'), 'file_name': filename}
+
+
+async def create_note_with_files(client, org_id, upload_session_id, note, upload_slots):
+    notes_url = f'{RM_API}/solar_farms/{note["solar_farm_id"]}/equipment/{note["object_id"]}/notes'
+    # Upload the files together, and create the note only once they all made it
+    files = await asyncio.gather(
+        *(upload_note_file(client, org_id, upload_session_id, filepath, upload_slots)
+          for filepath in note['files']),
+    )
+    created = await post_json(client, f'{notes_url}?org_id={org_id}', {'title': note['title'], 'body': note['body']})
+    # Associate all of the note's files in one request
+    if files:
+        await post_json(client, f'{notes_url}/{created.get("id")}/files?org_id={org_id}', {'files': files})
+    return created.get('id')
+
+
+async def create_notes_from_manifest(notes, max_notes=DEFAULT_MAX_NOTES, max_uploads=DEFAULT_MAX_UPLOADS):
+    org_id = os.environ.get('RM_ORG_ID')
+    # Authenticate once up front rather than in the first wave of requests
+    get_api_access_token()
+    file_total = sum(len(note['files']) for note in notes)
+
+    # API calls are paced by the shared scheduler; S3 uploads go straight out,
+    # limited to max_uploads at a time
+    api_transport = SchedulingTransport(RequestScheduler())
+    note_slots = asyncio.Semaphore(max_notes)
+    upload_slots = asyncio.Semaphore(max_uploads)
+    async with httpx.AsyncClient(timeout=TIMEOUT, mounts={RM_API: api_transport}) as client:
+        # One upload session sized for every file in the manifest
+        upload_session_id = None
+        if file_total:
+            upload_session = await post_json(
+                client, f'{RM_API}/v2/feature_upload_session?org_id={org_id}', {'file_total': file_total})
+            upload_session_id = upload_session.get('upload_session').get('id')
+            print(f'Upload session {upload_session_id} created for {file_total} file(s)')
+
+        async def create_note(note):
+            async with note_slots:
+                return await create_note_with_files(client, org_id, upload_session_id, note, upload_slots)
+
+        results = await asyncio.gather(*(create_note(note) for note in notes), return_exceptions=True)
+
+    # Failed notes are reported here, so one bad row does not stop the others
+    failures = [(note, result) for note, result in zip(notes, results) if isinstance(result, BaseException)]
+    for note, error in failures:
+        print(f'Could not create note "{note["title"]}" on object {note["object_id"]}: {error!r}')
+    print(f'Created {len(notes) - len(failures)} of {len(notes)} note(s) with {file_total} file(s) in total')
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create equipment notes with file attachments')
+    parser.add_argument('--manifest', help='CSV or JSONL file with one note per row (batch mode)')
+    parser.add_argument('--max-notes', type=int, default=DEFAULT_MAX_NOTES,
+                        help=f'Notes worked on at the same time (default: {DEFAULT_MAX_NOTES})')
+    parser.add_argument('--max-uploads', type=int, default=DEFAULT_MAX_UPLOADS,
+                        help=f'S3 uploads in flight at the same time (default: {DEFAULT_MAX_UPLOADS})')
+    args = parser.parse_args()
+
+    if not args.manifest:
+        create_single_note()
+        return 0
+    notes = read_manifest(args.manifest)
+    ok = asyncio.run(create_notes_from_manifest(notes, args.max_notes, args.max_uploads))
+    return 0 if ok else 1
+
+
 if __name__ == '__main__':
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,64 @@
+"""
+Streaming farm pagination — Raptor Maps API
+
+``GET /v2/solar_farms`` returns farms 100 at a time.  Rather than walking every
+page before doing anything with the results, ``iter_farm_pages`` yields each
+page as soon as it arrives and already has the request for the next page in
+flight while the caller works on the current one.
+
+USAGE:
+    async with httpx.AsyncClient() as client:
+        async for farm in iter_farms(client, org_id, headers):
+            ...
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator
+
+import httpx
+
+BASE_URL = "https://api.raptormaps.com"
+
+# Number of farms the API returns per page
+PAGE_SIZE = 100
+
+TIMEOUT = httpx.Timeout(timeout=10, read=600.0, pool=180.0)
+
+
+async def _get_farm_page(client: httpx.AsyncClient, org_id, headers: dict | None, offset: int) -> list[dict]:
+    url = f'{BASE_URL}/v2/solar_farms?org_id={org_id}&offset={offset}'
+    res = await client.get(url, headers=headers, timeout=TIMEOUT)
+    if res.status_code != 200:
+        print(res.json())
+        res.raise_for_status()
+    return res.json()
+
+
+async def iter_farm_pages(client: httpx.AsyncClient, org_id, headers: dict | None = None) -> AsyncIterator[list[dict]]:
+    """Yield pages of farms until the API returns an empty page.
+
+    The next page is requested before the current one is yielded, so
+    pagination overlaps with whatever the caller does with each page.
+    """
+    offset = 0
+    next_page = asyncio.ensure_future(_get_farm_page(client, org_id, headers, offset))
+    try:
+        while True:
+            farms_list = await next_page
+            if not farms_list:
+                return
+            offset += PAGE_SIZE
+            next_page = asyncio.ensure_future(_get_farm_page(client, org_id, headers, offset))
+            yield farms_list
+    finally:
+        if not next_page.done():
+            next_page.cancel()
+
+
+async def iter_farms(client: httpx.AsyncClient, org_id, headers: dict | None = None) -> AsyncIterator[dict]:
+    """Yield farms one at a time, page by page, as they arrive."""
+    async for farms_list in iter_farm_pages(client, org_id, headers):
+        for farm in farms_list:
+            yield farm
@@ -1,11 +1,16 @@
-import csv
-import json
+import argparse
 import os
-import sys
 from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 
 import httpx
 
+from json_stream import iter_json_array
+from table_writer import OUTPUT_FORMATS, open_table
+from token_cache import get_token
+
 """
 For questions, reference the Raptor Maps API documentation found at "https://docs.raptormaps.com/reference/reference-getting-started"
 
@@ -21,12 +26,27 @@ To call the script, add the inspection id as an argument:
 > python filtered_anomaly_csv.py <inspection_id>
 
 The script will produce a CSV labled with the inspection ID and the current date and time as of the running of the script.
+
+To write typed Parquet or Arrow columns instead of CSV (requires pyarrow), add --format:
+> python filtered_anomaly_csv.py <inspection_id> --format parquet
+
+For very large inspections, --batch-size maps the anomalies that many at a time, one
+column at a time, instead of one anomaly at a time. The output is the same.
+> python filtered_anomaly_csv.py <inspection_id> --batch-size 10000
 """
 
 base_url = "https://api.raptormaps.com"  # points to Raptor Maps public api
 current = datetime.now()
 org_id: int = os.environ.get('ORG_ID')
-inspection_id: int = sys.argv[1]
+
+parser = argparse.ArgumentParser(description='Write the filtered anomalies of an inspection to CSV')
+parser.add_argument('inspection_id', help='Inspection to export')
+parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                    help='Output format; parquet and arrow need pyarrow (default: csv)')
+parser.add_argument('--batch-size', type=int, default=0,
+                    help='Map anomalies in batches of this size, column by column (default: one at a time)')
+args = parser.parse_args()
+inspection_id: int = args.inspection_id
 
 # For translating the numerical value for priority into a text string
 priority_dict = {
@@ -54,50 +74,81 @@ def map_anomaly_values(anomaly):
 
     return item
 
-# Use the secret and ID to retrieve an authentication token from Raptor Maps system
+# The batched version of map_anomaly_values. Each column is built in one pass over
+# the batch, and the datetime and priority conversions are cached, since many
+# anomalies share a timestamp and there are only six priorities. The columns go
+# to the writer together, without building a dict per anomaly.
+
+
+@lru_cache(maxsize=64 * 1024, typed=True)
+def utc_datetime(tsecs):
+    return datetime.fromtimestamp(tsecs, tz=timezone.utc)
+
+
+@lru_cache(maxsize=None, typed=True)
+def priority_name(priority):
+    return priority_dict[str(priority)]
+
+
+def map_anomaly_batch(anomalies):
+    return {
+        "Anomaly ID": list(map(itemgetter("id"), anomalies)),
+        "Anomaly Type": [anomaly["tag"]["tag"] for anomaly in anomalies],
+        "Life Cycle Status": [anomaly["anomaly_life_cycle"]["status"] for anomaly in anomalies],
+        "Datetime UTC": list(map(utc_datetime, map(itemgetter("created_tsecs"), anomalies))),
+        "RM Custom Location": list(map(itemgetter("custom_locator_text"), anomalies)),
+        "Priority": list(map(priority_name, map(itemgetter("priority"), anomalies))),
+    }
+
+# Use the secret and ID to retrieve an authentication token from Raptor Maps system.
+# The token is cached on disk and reused until shortly before it expires.
 
 
 def get_bearer_token():
     client_secret = os.environ["CLIENT_SECRET"]
     client_id = os.environ["CLIENT_ID"]
-    headers = {"content-type": "application/json"}
-    url = f"{base_url}/oauth/token"
-    body = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "audience": "api://customer-api"
-    }
 
-    token_response = httpx.post(url, headers=headers, data=json.dumps(body))
-
-    response_data = token_response.json()
-    return response_data.get("access_token")
+    return get_token(client_id, client_secret)
 
 
 token: str = get_bearer_token()
 
-# Use the bearer token to retrieve the anomaly data for the desired inspection
+# Use the bearer token to retrieve the anomaly data for the desired inspection.
+# The defects are yielded one at a time as the response streams in (see
+# json_stream.py), so a large inspection is never held in memory all at once.
 
 
 def get_anomaly_data(inspection_id):
     headers = {'Authorization': f'Bearer {token}'}
-    anomalies = httpx.get(
+    with httpx.stream(
+        'GET',
         f'{base_url}/v2/solar_inspections/{inspection_id}/anomalies?org_id={org_id}&include_tags=9612, 9603, 9604',
         headers=headers
-    )
-
-    return anomalies.json()['defects']
-
-
-anomalies_list: list[dict] = get_anomaly_data(inspection_id)
-
-# Write the CSV file. This will place the file in the same folder as the script.
-with open(f'anamolies_for_inspection_{inspection_id}_{current}.csv', 'w', newline='') as newcsv:
-    fieldnames = ["Anomaly ID", "Anomaly Type", "Life Cycle Status",
-                  "Datetime UTC", "RM Custom Location", "Priority"]
-    writer = csv.DictWriter(newcsv, fieldnames=fieldnames)
+    ) as anomalies:
+        anomalies.raise_for_status()
+        yield from iter_json_array(anomalies, 'defects')
+
+
+# Write the output file. This will place the file in the same folder as the script.
+# Parquet and Arrow keep the anomaly ID as an integer and the datetime as a UTC timestamp.
+fieldnames = ["Anomaly ID", "Anomaly Type", "Life Cycle Status",
+              "Datetime UTC", "RM Custom Location", "Priority"]
+column_types = {
+    "Anomaly ID": "int64",
+    "Anomaly Type": "string",
+    "Life Cycle Status": "string",
+    "Datetime UTC": "timestamp",
+    "RM Custom Location": "string",
+    "Priority": "string",
+}
 
-    writer.writeheader()
-    for anomaly in anomalies_list:
-        item = map_anomaly_values(anomaly)
-        writer.writerow(item)
+with open_table(f'anamolies_for_inspection_{inspection_id}_{current}', args.format,
+                fieldnames, column_types) as table:
+    anomalies = get_anomaly_data(inspection_id)
+    if args.batch_size > 0:
+        for batch in iter(lambda: list(islice(anomalies, args.batch_size)), []):
+            table.write_columns(map_anomaly_batch(batch))
+    else:
+        for anomaly in anomalies:
+            item = map_anomaly_values(anomaly)
+            table.write(item)
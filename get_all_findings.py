@@ -1,57 +1,55 @@
+import argparse
 import asyncio
-import csv
-import json
 import os
 
 import httpx
 from httpx_retries import Retry, RetryTransport
 
+from farm_pagination import iter_farms
+from http_cache import CachingTransport
+from scheduler import RequestScheduler, SchedulingTransport
+from table_writer import OUTPUT_FORMATS, open_table
+from token_cache import TokenAuth
+
 env_vars = os.environ
 base_url = "https://api.raptormaps.com"
-file_name = 'inspection_findings.csv'
+file_stem = 'inspection_findings'
 fieldnames = ['anomaly', 'anomaly_count', 'est_affected_dc_kw', 'est_affected_dc_percent',
               'est_annual_impact_kw_h', 'est_annual_impact_dollars', 'module_count', "farm_name", "inspection_id"]
+# Column types for Parquet and Arrow output, so the numbers stay numbers
+column_types = {
+    'anomaly': 'string',
+    'anomaly_count': 'int64',
+    'est_affected_dc_kw': 'float64',
+    'est_affected_dc_percent': 'float64',
+    'est_annual_impact_kw_h': 'float64',
+    'est_annual_impact_dollars': 'float64',
+    'module_count': 'int64',
+    'farm_name': 'string',
+    'inspection_id': 'int64',
+}
 
 
 retry = Retry(total=5, backoff_factor=0.75)
 
+# Findings responses waiting for the writer. The queue is bounded so farms that
+# finish early wait for the writer instead of piling up in memory.
+findings_queue_size = 64
+write_buffer_size = 1024 * 1024
 
-def get_bearer_token(client_secret, client_id):
-    url = f'{base_url}/oauth/token'
-    headers = {'content-type': 'application/json'}
-    body = {
-        'client_id': client_id,
-        'client_secret': client_secret,
-        'audience': 'api://customer-api'}
-
-    token_response = httpx.post(
-        url,
-        headers=headers,
-        data=json.dumps(body))
-
-    response_data = token_response.json()
-    return response_data.get('access_token')
 
+# The token is looked up for every request, so one that is refreshed during a
+# long run is picked up (see token_cache.py)
+auth = TokenAuth(env_vars['CLIENT_ID'], env_vars['CLIENT_SECRET'])
 
-bearer_token = get_bearer_token(
-    env_vars['CLIENT_SECRET'], env_vars['CLIENT_ID'])
-headers = {'Authorization': f"Bearer {bearer_token}"}
 
-
-def write_findings_to_csv(findings):
-    with open(file_name, 'a', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        for finding in findings:
-            for item in finding:
-                writer.writerow(item)
-
-# Get findings from latest inspections and write data to CSV.
+# Get findings from latest inspections and write data to the output file.
 
 
 async def get_inspection_findings(farm_inspection, client):
     inspection_id = farm_inspection["inspection_id"]
     url = f'{base_url}/v2/solar_inspections/{inspection_id}/findings?org_id={env_vars["ORG_ID"]}'
-    res = await client.get(url, headers=headers, timeout=httpx.Timeout(timeout=10, read=600.0, pool=180.0))
+    res = await client.get(url, timeout=httpx.Timeout(timeout=10, read=600.0, pool=180.0))
     if res.status_code not in [200, 204]:
         print(res.status_code)
         res.raise_for_status()
@@ -63,36 +61,23 @@ async def get_inspection_findings(farm_inspection, client):
         return findings
 
 
-async def get_all_farms():
-    farm_ids = []
-    result_list_len = 1
-    i = 0
-    async with httpx.AsyncClient() as client:
-        while result_list_len != 0:
-            offset = i*100
-            url = f'{base_url}/v2/solar_farms?org_id={env_vars["ORG_ID"]}&offset={offset}'
-            res = await client.get(url, headers=headers, timeout=httpx.Timeout(timeout=10, read=600.0, pool=180.0))
-            if res.status_code != 200:
-                print(res.json())
-                res.raise_for_status()
-            farms_list = res.json()
-            result_list_len = len(farms_list)
-            for item in farms_list:
-                farm_object = {
-                    "id": item["id"],
-                    "name": item["name"],
-                }
-                farm_ids.append(farm_object)
-            i += 1
-
-    return farm_ids
+# Farms stream in page by page; see farm_pagination.py.
+
+
+async def get_all_farms(client):
+    async for item in iter_farms(client, env_vars["ORG_ID"]):
+        farm_object = {
+            "id": item["id"],
+            "name": item["name"],
+        }
+        yield farm_object
 
 
 async def get_latest_inspection(farm, client):
     latest_inspection_id = 0
     farm_id = farm["id"]
     url = f'{base_url}/v2/solar_farms/{farm_id}/solar_inspections?org_id={env_vars["ORG_ID"]}'
-    res = await client.get(url, headers=headers, timeout=httpx.Timeout(timeout=10, read=600.0, pool=180.0))
+    res = await client.get(url, timeout=httpx.Timeout(timeout=10, read=600.0, pool=180.0))
     if res.status_code != 200:
         res.raise_for_status()
     if len(res.json()) > 0:
@@ -106,34 +91,70 @@ async def get_latest_inspection(farm, client):
     }
     return farm_inspection
 
-
-async def create_findings_file():
-    farm_inspections_list = []
-    transport = RetryTransport(retry=retry)
-    farm_ids = await get_all_farms()
-    with open(file_name, 'w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        csvfile.close()
-    async with httpx.AsyncClient(transport=transport) as client:
-        pending = []
-        for item in farm_ids:
-            pending.append(get_latest_inspection(item, client))
-        results_list = await asyncio.gather(*pending, return_exceptions=True)
-        for result in results_list:
-            if isinstance(result, BaseException):
-                print(result)
-                raise result
-            farm_inspection = result
-            if farm_inspection["inspection_id"] != 0:
-                farm_inspections_list.append(farm_inspection)
-        pending.clear()
-        for farm_inspection in farm_inspections_list:
-            pending.append(get_inspection_findings(farm_inspection, client))
-        results_list = await asyncio.gather(*pending, return_exceptions=True)
-        write_findings_to_csv(results_list)
-        print(f"All Finished. Find your results at {file_name}")
+# Each farm runs its own latest inspection -> findings chain, so a slow farm only
+# delays its own rows. Finished findings are handed to a single writer task.
+
+
+async def get_farm_findings(farm, client, findings_queue):
+    farm_inspection = await get_latest_inspection(farm, client)
+    if farm_inspection["inspection_id"] != 0:
+        findings = await get_inspection_findings(farm_inspection, client)
+        if findings:
+            await findings_queue.put(findings)
+
+
+# Parquet and Arrow rows are written a row group at a time as findings arrive
+# (see table_writer.py).
+
+
+async def write_findings(findings_queue, table):
+    while True:
+        findings = await findings_queue.get()
+        if findings is None:
+            break
+        table.write_rows(findings)
+
+
+async def create_findings_file(output_format='csv'):
+    # Cache, then retries, then the scheduler; scheduler.py explains the order.
+    transport = CachingTransport(RetryTransport(
+        transport=SchedulingTransport(RequestScheduler()), retry=retry))
+    findings_queue = asyncio.Queue(maxsize=findings_queue_size)
+    with open_table(file_stem, output_format, fieldnames, column_types,
+                    buffering=write_buffer_size) as table:
+        writer_task = asyncio.create_task(write_findings(findings_queue, table))
+        async with httpx.AsyncClient(transport=transport, auth=auth) as client:
+            farms = []
+            pending = []
+            async for item in get_all_farms(client):
+                farms.append(item)
+                pending.append(asyncio.create_task(
+                    get_farm_findings(item, client, findings_queue)))
+            chains = asyncio.gather(*pending, return_exceptions=True)
+            # The writer only finishes early if it failed; stop the farms rather than
+            # leaving them blocked on a full queue.
+            await asyncio.wait([chains, writer_task], return_when=asyncio.FIRST_COMPLETED)
+            if writer_task.done():
+                chains.cancel()
+                writer_task.result()
+            results_list = await chains
+        await findings_queue.put(None)
+        await writer_task
+
+    # Failed farms are reported here rather than written to the output file, so one
+    # bad farm does not lose the findings of all the others.
+    failures = [(farm, result) for farm, result in zip(farms, results_list)
+                if isinstance(result, BaseException)]
+    for farm, error in failures:
+        print(f"Could not get findings for farm {farm['name']} ({farm['id']}): {error!r}")
+    if failures:
+        print(f"{len(failures)} of {len(farms)} farms failed and are missing from {table.path}")
+    print(f"All Finished. Find your results at {table.path}")
 
 
 if __name__ == "__main__":
-    id_list = asyncio.run(create_findings_file())
+    parser = argparse.ArgumentParser(description='Write the findings of the latest inspection of every farm')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help='Output format; parquet and arrow need pyarrow (default: csv)')
+    args = parser.parse_args()
+    id_list = asyncio.run(create_findings_file(args.format))
@@ -1,105 +1,205 @@
 import asyncio
+import contextlib
+import hashlib
 import json
 import os
 
 import httpx
 from httpx_retries import Retry, RetryTransport
 
+from farm_pagination import iter_farms
+from http_cache import CachingTransport
+from scheduler import RequestScheduler, SchedulingTransport
+from token_cache import TokenAuth
+
 env_vars = os.environ
 base_url = "https://api.raptormaps.com"
 
 retry = Retry(total=5, backoff_factor=0.75)
 
+# Exports are streamed to disk one chunk at a time, so each download holds at most
+# one chunk in memory. Limiting downloads to max_in_flight_bytes // chunk size keeps
+# the total memory used by exports bounded, however large or numerous they are.
+download_chunk_size = int(env_vars.get('RM_DOWNLOAD_CHUNK_SIZE', 1024 * 1024))
+max_in_flight_bytes = int(env_vars.get('RM_MAX_IN_FLIGHT_BYTES', 64 * 1024 * 1024))
+
+# Records what has been downloaded so later runs only fetch inspections that changed
+manifest_file = f'{os.getcwd()}/map_exports_manifest.json'
+
+
+# The token is looked up for every request, so one that is refreshed during a
+# long run is picked up (see token_cache.py)
+auth = TokenAuth(env_vars['CLIENT_ID'], env_vars['CLIENT_SECRET'])
+
+
+# The manifest maps inspection ID -> updated_tsecs, size and sha256 of its zip.
+# An entry with "complete": false describes a .part file that can be resumed.
+
+
+def load_manifest():
+    try:
+        with open(manifest_file) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
 
-def get_bearer_token(client_secret, client_id):
-    url = 'https://api.raptormaps.com/oauth/token'
-    headers = {'content-type': 'application/json'}
-    body = {
-        'client_id': client_id,
-        'client_secret': client_secret,
-        'audience': 'api://customer-api'}
 
-    token_response = httpx.post(
-        url,
-        headers=headers,
-        data=json.dumps(body))
+def save_manifest(manifest):
+    tmp_file = f'{manifest_file}.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_file, manifest_file)
 
-    response_data = token_response.json()
-    return response_data.get('access_token')
 
+def is_unchanged(inspection, manifest):
+    entry = manifest.get(str(inspection["id"]))
+    output = f'{os.getcwd()}/{inspection["id"]}.zip'
+    return (entry is not None
+            and entry["complete"]
+            and entry["updated_tsecs"] == inspection["updated_tsecs"]
+            and os.path.exists(output)
+            and os.path.getsize(output) == entry["size"])
 
-bearer_token = get_bearer_token(
-    env_vars['CLIENT_SECRET'], env_vars['CLIENT_ID'])
-headers = {'Authorization': f"Bearer {bearer_token}"}
 
+# The zip is written to a .part file next to the output and renamed into place once
+# complete, so an interrupted run never leaves a truncated zip behind. A .part file
+# left by an earlier run of the same inspection version is resumed with a Range
+# request; if the server ignores the range, or answers with a range that does not
+# start where the .part file ends, the download starts over.
 
-async def get_map_extracts(inspection_id, client):
+
+def hash_partial(partial):
+    # Runs in a worker thread, so hashing a large .part file does not stall the
+    # other downloads
+    checksum = hashlib.sha256()
+    size = 0
+    with open(partial, 'rb') as f:
+        for chunk in iter(lambda: f.read(download_chunk_size), b''):
+            checksum.update(chunk)
+            size += len(chunk)
+    return checksum, size
+
+
+def content_range_start(res):
+    # 'bytes 1000-4999/5000' -> 1000, or None if the header is missing or malformed
+    try:
+        return int(res.headers['Content-Range'].split()[1].split('-')[0])
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+async def get_map_extracts(inspection, client, download_slots, manifest):
+    inspection_id = inspection["id"]
     output = f'{os.getcwd()}/{inspection_id}.zip'
+    partial = f'{output}.part'
     url = f'{base_url}/v2/solar_inspections/{inspection_id}/exports/map_exports?org_id={env_vars["ORG_ID"]}'
-    res = await client.get(url, headers=headers, timeout=httpx.Timeout(timeout=10, read=600.0, pool=180.0))
-    if res.status_code not in [200, 204]:
-        print(res.status_code)
-        res.raise_for_status()
-    if res.status_code == 200:
-        with open(output, 'wb') as f:
-            f.write(res.content)
-
-
-def get_all_farms():
-    farm_ids = []
-    result_list_len = 1
-    i = 0
-    with httpx.Client() as client:
-        while result_list_len != 0:
-            offset = i*100
-            url = f'{base_url}/v2/solar_farms?org_id={env_vars["ORG_ID"]}&offset={offset}'
-            res = client.get(url, headers=headers, timeout=httpx.Timeout(
-                timeout=10, read=600.0, pool=180.0))
-            if res.status_code != 200:
-                print(res.json())
-                res.raise_for_status()
-            farms_list = res.json()
-            result_list_len = len(farms_list)
-            for item in farms_list:
-                farm_ids.append(item["id"])
-            i += 1
-
-    return farm_ids
+
+    entry = manifest.get(str(inspection_id))
+    checksum = hashlib.sha256()
+    offset = 0
+    if (entry is not None and not entry["complete"]
+            and entry["updated_tsecs"] == inspection["updated_tsecs"]
+            and os.path.exists(partial)):
+        checksum, offset = await asyncio.to_thread(hash_partial, partial)
+    request_headers = {}
+    if offset:
+        request_headers['Range'] = f'bytes={offset}-'
+
+    restart = False
+    async with download_slots:
+        async with client.stream('GET', url, headers=request_headers, timeout=httpx.Timeout(timeout=10, read=600.0, pool=180.0)) as res:
+            if res.status_code == 416 or (res.status_code == 206 and content_range_start(res) != offset):
+                # The partial file no longer matches what the server has
+                restart = True
+            else:
+                if res.status_code not in [200, 204, 206]:
+                    print(res.status_code)
+                    res.raise_for_status()
+                if res.status_code == 204:
+                    return
+                if res.status_code == 200 and offset:
+                    print(f'Server ignored range request, restarting {inspection_id}.zip')
+                    checksum = hashlib.sha256()
+                    offset = 0
+
+                manifest[str(inspection_id)] = {
+                    "updated_tsecs": inspection["updated_tsecs"],
+                    "complete": False,
+                }
+                save_manifest(manifest)
+                with open(partial, 'ab' if offset else 'wb') as f:
+                    async for chunk in res.aiter_bytes(download_chunk_size):
+                        f.write(chunk)
+                        checksum.update(chunk)
+                        offset += len(chunk)
+
+    if restart:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(partial)
+        manifest.pop(str(inspection_id), None)
+        return await get_map_extracts(inspection, client, download_slots, manifest)
+
+    os.replace(partial, output)
+    manifest[str(inspection_id)] = {
+        "updated_tsecs": inspection["updated_tsecs"],
+        "complete": True,
+        "size": offset,
+        "sha256": checksum.hexdigest(),
+    }
+    save_manifest(manifest)
+
+
+# Farms stream in page by page; see farm_pagination.py.
+
+
+async def get_all_farms(client):
+    async for item in iter_farms(client, env_vars["ORG_ID"]):
+        yield item["id"]
 
 
 async def get_latest_inspection(farm_id, client):
-    latest_inspection_id = 0
+    latest_inspection = None
     url = f'{base_url}/v2/solar_farms/{farm_id}/solar_inspections?org_id={env_vars["ORG_ID"]}'
-    res = await client.get(url, headers=headers, timeout=httpx.Timeout(timeout=10, read=600.0, pool=180.0))
+    res = await client.get(url, timeout=httpx.Timeout(timeout=10, read=600.0, pool=180.0))
     if res.status_code != 200:
         res.raise_for_status()
     if len(res.json()) > 0:
         sorted_inspections = sorted(
             res.json(), key=lambda x: x['updated_tsecs'], reverse=True)
-        latest_inspection_id = sorted_inspections[0]['id']
+        latest_inspection = {
+            "id": sorted_inspections[0]['id'],
+            "updated_tsecs": sorted_inspections[0]['updated_tsecs'],
+        }
 
-    return latest_inspection_id
+    return latest_inspection
 
 
 async def get_new_inspection_list():
-    inspection_ids = []
-    transport = RetryTransport(retry=retry)
-    farm_ids = get_all_farms()
-    async with httpx.AsyncClient(transport=transport) as client:
+    inspections = []
+    manifest = load_manifest()
+    # Cache, then retries, then the scheduler; scheduler.py explains the order.
+    transport = CachingTransport(RetryTransport(
+        transport=SchedulingTransport(RequestScheduler()), retry=retry))
+    async with httpx.AsyncClient(transport=transport, auth=auth) as client:
         pending = []
-        for item in farm_ids:
-            pending.append(get_latest_inspection(item, client))
+        async for item in get_all_farms(client):
+            pending.append(asyncio.create_task(
+                get_latest_inspection(item, client)))
         results_list = await asyncio.gather(*pending, return_exceptions=True)
         for result in results_list:
             if isinstance(result, BaseException):
                 print(result)
                 raise result
-            insp_id = result
-            if insp_id != 0:
-                inspection_ids.append(insp_id)
+            inspection = result
+            if inspection is not None and not is_unchanged(inspection, manifest):
+                inspections.append(inspection)
+        print(f'{len(inspections)} map export(s) are new or changed since the last run')
         pending.clear()
-        for inspection_id in inspection_ids:
-            pending.append(get_map_extracts(inspection_id, client))
+        download_slots = asyncio.Semaphore(
+            max(1, max_in_flight_bytes // download_chunk_size))
+        for inspection in inspections:
+            pending.append(get_map_extracts(
+                inspection, client, download_slots, manifest))
         results_list = await asyncio.gather(*pending, return_exceptions=True)
         for result in results_list:
             if isinstance(result, BaseException):
@@ -0,0 +1,374 @@
+"""
+On-disk HTTP response cache — Raptor Maps API
+
+Reporting scripts fetch the same farm lists, inspection lists and findings on
+every run.  ``ResponseCache`` keeps JSON ``GET`` responses on disk so repeated
+runs can be served locally:
+
+    • A cached response is used as-is for ``ttl`` seconds (or the response's
+      ``Cache-Control: max-age``).  A response marked ``no-cache``, or a
+      request sent with ``no-cache``, is revalidated every time.
+    • After that it is revalidated with ``If-None-Match`` / ``If-Modified-Since``
+      when the server sent an ``ETag`` / ``Last-Modified``; a 304 renews it.
+    • The cache is kept under a size budget by evicting least recently used
+      entries.  The total size is counted once per process and then kept up
+      to date as entries are stored; the directory is only scanned again when
+      it goes over the budget.
+    • Routes that return credentials, tokens, live status or file downloads
+      are never cached (see ``UNCACHED_PATHS``).  Neither is a response marked
+      ``no-store`` or ``private``, nor a request sent with
+      ``Cache-Control: no-store`` — use it for large responses you want to
+      stream, since caching reads the whole body first.
+
+Entries are keyed by URL and by a hash of the ``Authorization`` header, so a
+response is only ever served back to the credentials that fetched it.
+
+Two integrations are provided:
+
+    CachingTransport   — wraps an httpx async transport
+    CachingAdapter     — a requests ``HTTPAdapter`` to mount on a ``Session``
+
+Environment Variables
+─────────────────────
+    RM_HTTP_CACHE_DIR        Cache directory (default: ~/.cache/raptormaps/http)
+    RM_HTTP_CACHE_TTL        Seconds a response is used without revalidation (default: 300)
+    RM_HTTP_CACHE_MAX_BYTES  Size budget for cached bodies (default: 512 MB)
+
+USAGE:
+    transport = CachingTransport(RetryTransport(retry=retry))
+    async with httpx.AsyncClient(transport=transport) as client:
+        ...
+
+    session = requests.Session()
+    session.mount(BASE_URL, CachingAdapter())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+try:
+    import httpx
+except ImportError:  # the upload scripts only install requests
+    httpx = None
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+except ImportError:  # the reporting scripts only install httpx
+    requests = None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Constants
+# ──────────────────────────────────────────────────────────────────────────────
+
+CACHE_DIR = Path(
+    os.environ.get("RM_HTTP_CACHE_DIR", Path.home() / ".cache" / "raptormaps" / "http")
+)
+DEFAULT_TTL = float(os.environ.get("RM_HTTP_CACHE_TTL", 300))
+MAX_BYTES = int(os.environ.get("RM_HTTP_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Routes whose responses must always come from the server. Orders carry the
+# access tokens of their upload requests.
+UNCACHED_PATHS = re.compile(r"/oauth/|/token\b|/v2/orders\b|/aws_credentials|/status\b|/exports/|/s3_link")
+
+# Headers that describe the wire encoding rather than the (decoded) body we store
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Storage
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class ResponseCache:
+    """Disk-backed store for cacheable ``GET`` responses.
+
+    Each entry is two files named after a hash of the URL: ``<key>.json`` with
+    the status, headers and timestamps, and ``<key>.body`` with the decoded
+    body.  The body's mtime doubles as the LRU clock.
+
+    Parameters
+    ----------
+    directory : Where entries are stored.
+    ttl       : Default freshness lifetime in seconds.
+    max_bytes : Total body size above which the oldest entries are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: Path = CACHE_DIR,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = MAX_BYTES,
+    ) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True, mode=0o700)
+        self._total: int | None = None  # body bytes on disk, counted on first store
+        self._lock = threading.Lock()
+
+    # ── Policy ───────────────────────────────────────────────────────────
+
+    @staticmethod
+    def is_cacheable_request(method: str, url: str, headers) -> bool:
+        return (
+            method.upper() == "GET"
+            and "range" not in {k.lower() for k in headers.keys()}
+            and "no-store" not in headers.get("cache-control", "")
+            and not UNCACHED_PATHS.search(str(url))
+        )
+
+    @staticmethod
+    def is_cacheable_response(status_code: int, headers) -> bool:
+        content_type = headers.get("content-type", "")
+        cache_control = headers.get("cache-control", "")
+        return (
+            status_code == 200
+            and "json" in content_type
+            and "no-store" not in cache_control
+            and "private" not in cache_control
+        )
+
+    @staticmethod
+    def requires_revalidation(headers) -> bool:
+        """True if the request asks not to be answered from the cache unchecked."""
+        return "no-cache" in headers.get("cache-control", "")
+
+    # ── Entries ──────────────────────────────────────────────────────────
+
+    def _paths(self, url: str, headers) -> tuple[Path, Path]:
+        auth = hashlib.sha256(headers.get("authorization", "").encode()).hexdigest()
+        key = hashlib.sha256(f"{url}\n{auth}".encode()).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def lookup(self, url: str, headers) -> dict | None:
+        """Return the cached entry for *url* as requested with *headers*, with
+        ``body`` and ``fresh`` filled in."""
+        meta_path, body_path = self._paths(url, headers)
+        try:
+            entry = json.loads(meta_path.read_text())
+            entry["body"] = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != str(url):
+            return None
+        entry["fresh"] = (time.time() - entry["stored_at"] < entry["ttl"]
+                          and not self.requires_revalidation(headers))
+        entry["paths"] = (str(meta_path), str(body_path))
+        os.utime(body_path)
+        return entry
+
+    def store(self, url: str, request_headers, status_code: int, headers, body: bytes) -> None:
+        """Write a response to the cache and evict old entries if over budget."""
+        kept_headers = [
+            [k, v] for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS
+        ]
+        entry = {
+            "url": str(url),
+            "status_code": status_code,
+            "headers": kept_headers,
+            "stored_at": time.time(),
+            "ttl": self._ttl_for(headers),
+        }
+        meta_path, body_path = self._paths(url, request_headers)
+        try:
+            replaced = body_path.stat().st_size
+        except OSError:
+            replaced = 0
+        self._write_atomic(body_path, body)
+        self._write_atomic(meta_path, json.dumps(entry).encode())
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._bodies())
+            else:
+                self._total += len(body) - replaced
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def refresh(self, entry: dict, headers) -> None:
+        """Renew an entry after a ``304 Not Modified`` revalidation."""
+        for name in ("etag", "last-modified", "cache-control"):
+            if name in headers:
+                entry["headers"] = [h for h in entry["headers"] if h[0].lower() != name]
+                entry["headers"].append([name, headers[name]])
+        entry["stored_at"] = time.time()
+        entry["ttl"] = self._ttl_for(headers)
+        meta = {k: v for k, v in entry.items() if k not in ("body", "fresh", "paths")}
+        self._write_atomic(Path(entry["paths"][0]), json.dumps(meta).encode())
+
+    @staticmethod
+    def conditional_headers(entry: dict) -> dict[str, str]:
+        """Return the validators to send when revalidating *entry*."""
+        stored = {k.lower(): v for k, v in entry["headers"]}
+        conditional = {}
+        if "etag" in stored:
+            conditional["If-None-Match"] = stored["etag"]
+        if "last-modified" in stored:
+            conditional["If-Modified-Since"] = stored["last-modified"]
+        return conditional
+
+    def _ttl_for(self, headers) -> float:
+        if "no-cache" in headers.get("cache-control", ""):
+            return 0.0
+        match = re.search(r"max-age=(\d+)", headers.get("cache-control", ""))
+        return float(match.group(1)) if match else self.ttl
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        tmp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _bodies(self) -> list[tuple[float, int, Path]]:
+        bodies = []
+        for path in self.directory.glob("*.body"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            bodies.append((stat.st_mtime, stat.st_size, path))
+        return bodies
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the bodies fit the budget.
+
+        The directory is rescanned, since other processes may have added or
+        evicted entries since the running total was counted.  Caller holds
+        ``_lock``.
+        """
+        bodies = self._bodies()
+        total = sum(size for _, size, _ in bodies)
+        if total > self.max_bytes:
+            for _, size, path in sorted(bodies):
+                for stale in (path, path.with_suffix(".json")):
+                    try:
+                        stale.unlink()
+                    except OSError:
+                        pass
+                total -= size
+                if total <= self.max_bytes * 0.9:
+                    break
+        self._total = total
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# httpx integration
+# ──────────────────────────────────────────────────────────────────────────────
+
+if httpx is not None:
+
+    class CachingTransport(httpx.AsyncBaseTransport):
+        """Async httpx transport that answers from a ``ResponseCache`` when it can.
+
+        Wrap the outermost transport (e.g. ``RetryTransport``) so cache hits
+        never reach the network, retries or the request scheduler.  Responses
+        that are not cacheable are passed through untouched and still stream.
+        Cache files are read and written on a worker thread, so disk access
+        does not hold up the other requests on the event loop.
+        """
+
+        def __init__(
+            self,
+            transport: httpx.AsyncBaseTransport | None = None,
+            cache: ResponseCache | None = None,
+        ) -> None:
+            self._transport = transport or httpx.AsyncHTTPTransport()
+            self.cache = cache or ResponseCache()
+
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            url = str(request.url)
+            if not self.cache.is_cacheable_request(request.method, url, request.headers):
+                return await self._transport.handle_async_request(request)
+
+            entry = await asyncio.to_thread(self.cache.lookup, url, request.headers)
+            if entry is not None and entry["fresh"]:
+                return self._from_entry(entry)
+            if entry is not None:
+                request.headers.update(self.cache.conditional_headers(entry))
+
+            response = await self._transport.handle_async_request(request)
+            if response.status_code == 304 and entry is not None:
+                await response.aclose()
+                await asyncio.to_thread(self.cache.refresh, entry, response.headers)
+                return self._from_entry(entry)
+            if not self.cache.is_cacheable_response(response.status_code, response.headers):
+                return response
+
+            body = await response.aread()
+            await response.aclose()
+            await asyncio.to_thread(self.cache.store, url, request.headers, response.status_code,
+                                    response.headers, body)
+            headers = [(k, v) for k, v in response.headers.items()
+                       if k.lower() not in _DROPPED_HEADERS]
+            return httpx.Response(response.status_code, headers=headers, content=body,
+                                  extensions=response.extensions)
+
+        @staticmethod
+        def _from_entry(entry: dict) -> httpx.Response:
+            return httpx.Response(entry["status_code"], headers=entry["headers"],
+                                  content=entry["body"])
+
+        async def aclose(self) -> None:
+            await self._transport.aclose()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# requests integration
+# ──────────────────────────────────────────────────────────────────────────────
+
+if requests is not None:
+
+    class CachingAdapter(HTTPAdapter):
+        """requests ``HTTPAdapter`` that answers from a ``ResponseCache`` when it can.
+
+        Accepts the usual ``HTTPAdapter`` keyword arguments (pool sizes,
+        retries) in addition to *cache*.
+        """
+
+        def __init__(self, cache: ResponseCache | None = None, **kwargs) -> None:
+            super().__init__(**kwargs)
+            self.cache = cache or ResponseCache()
+
+        def send(self, request, **kwargs):
+            if not self.cache.is_cacheable_request(request.method, request.url, request.headers):
+                return super().send(request, **kwargs)
+
+            entry = self.cache.lookup(request.url, request.headers)
+            if entry is not None and entry["fresh"]:
+                return self._from_entry(request, entry)
+            if entry is not None:
+                request.headers.update(self.cache.conditional_headers(entry))
+
+            response = super().send(request, **kwargs)
+            if response.status_code == 304 and entry is not None:
+                response.close()
+                self.cache.refresh(entry, response.headers)
+                return self._from_entry(request, entry)
+            if self.cache.is_cacheable_response(response.status_code, response.headers):
+                self.cache.store(request.url, request.headers, response.status_code,
+                                 response.headers, response.content)
+            return response
+
+        @staticmethod
+        def _from_entry(request, entry: dict):
+            response = requests.Response()
+            response.status_code = entry["status_code"]
+            response.reason = "OK"
+            response.headers = CaseInsensitiveDict(entry["headers"])
+            response.encoding = get_encoding_from_headers(response.headers)
+            response.url = request.url
+            response.request = request
+            response._content = entry["body"]
+            return response
@@ -0,0 +1,108 @@
+"""
+Streaming JSON arrays — Raptor Maps API
+
+Some responses wrap a very large array in an object, e.g. ``/anomalies``
+returns ``{"defects": [...]}`` with tens of thousands of nested defects.
+``response.json()`` buffers the whole body and builds every item before the
+caller sees the first one.  The helpers here yield the items of one top-level
+array as the body streams in, so only a handful are in memory at a time.
+
+Incremental parsing uses ``ijson`` (``pip install ijson``) when it is
+installed.  Without it the body is parsed in one go, as before, and the items
+are yielded from the result — same output, without the memory savings.
+
+USAGE:
+    async with client.stream("GET", url) as res:
+        async for defect in aiter_json_array(res, "defects"):
+            ...
+
+    with httpx.stream("GET", url) as res:
+        for defect in iter_json_array(res, "defects"):
+            ...
+"""
+
+from __future__ import annotations
+
+import json
+from typing import AsyncIterator, Iterator
+
+import httpx
+
+try:
+    import ijson
+except ImportError:  # optional: fall back to parsing the whole body
+    ijson = None
+
+
+def _parser(key: str):
+    # Items are collected into a list we drain after every chunk. use_float
+    # keeps numbers as float, exactly like json.loads, instead of Decimal.
+    items = ijson.sendable_list()
+    return items, ijson.items_coro(items, f"{key}.item", use_float=True)
+
+
+class _ArrayFinder:
+    """Watch the raw parse events until the array *key* starts.
+
+    ``items_coro`` yields nothing both for an empty array and for a body
+    without *key*; this tells the two apart, so a missing key raises
+    ``KeyError`` as ``json.loads(...)[key]`` does.  Chunks are only parsed a
+    second time until the array has been found, which is normally the first.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.found = False
+        self._events = ijson.sendable_list()
+        self._parser = ijson.parse_coro(self._events)
+
+    def send(self, chunk: bytes) -> None:
+        if self.found:
+            return
+        self._parser.send(chunk)
+        self.found = any(prefix == self.key and event == "start_array"
+                         for prefix, event, _ in self._events)
+        del self._events[:]
+
+    def check(self) -> None:
+        if not self.found:
+            raise KeyError(self.key)
+
+
+def iter_json_array(response: httpx.Response, key: str) -> Iterator:
+    """Yield the items of the top-level array *key* from a streamed response."""
+    if ijson is None:
+        yield from json.loads(response.read())[key]
+        return
+
+    items, parser = _parser(key)
+    finder = _ArrayFinder(key)
+    for chunk in response.iter_bytes():
+        finder.send(chunk)
+        parser.send(chunk)
+        yield from items
+        del items[:]
+    parser.close()
+    finder.check()
+    yield from items
+
+
+async def aiter_json_array(response: httpx.Response, key: str) -> AsyncIterator:
+    """Async version of ``iter_json_array``."""
+    if ijson is None:
+        for item in json.loads(await response.aread())[key]:
+            yield item
+        return
+
+    items, parser = _parser(key)
+    finder = _ArrayFinder(key)
+    async for chunk in response.aiter_bytes():
+        finder.send(chunk)
+        parser.send(chunk)
+        for item in items:
+            yield item
+        del items[:]
+    parser.close()
+    finder.check()
+    for item in items:
+        yield item
@@ -0,0 +1,231 @@
+"""
+Bounded-concurrency request scheduler — Raptor Maps API
+
+The async example scripts fan out one request per farm or per inspection.
+Sending them all at once trips the API's back-off, which then costs retries.
+``RequestScheduler`` paces those requests instead:
+
+    • At most ``limit`` requests are in flight at any time.
+    • A token bucket caps the request rate (``rate`` per second, ``burst`` deep).
+    • The in-flight limit adapts (AIMD): it is halved when the server answers
+      429/503 and grows by roughly one per round-trip of successful requests,
+      back up to ``max_in_flight``.
+    • A ``Retry-After`` header pauses every new request until it has passed.
+
+``SchedulingTransport`` plugs the scheduler into an ``httpx.AsyncClient``.  Put
+it underneath ``RetryTransport`` so every attempt, including retries, is paced
+and every 429/503 is seen by the scheduler.  A ``CachingTransport`` (see
+http_cache.py) goes outside both, so responses it can answer are never sent,
+retried or counted against the limit.  ``retry_after_seconds`` is shared
+with the requests-based scripts, which do not need httpx installed to use it.
+
+Environment Variables
+─────────────────────
+    RM_MAX_IN_FLIGHT         Upper bound on concurrent requests (default: 16)
+    RM_REQUESTS_PER_SECOND   Sustained request rate (default: 50)
+
+USAGE:
+    scheduler = RequestScheduler()
+    transport = RetryTransport(transport=SchedulingTransport(scheduler), retry=retry)
+    async with httpx.AsyncClient(transport=transport) as client:
+        ...
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import os
+import time
+from typing import AsyncIterator
+
+try:
+    import httpx
+except ImportError:  # the requests-based scripts only use retry_after_seconds
+    httpx = None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Constants
+# ──────────────────────────────────────────────────────────────────────────────
+
+MAX_IN_FLIGHT = int(os.environ.get("RM_MAX_IN_FLIGHT", 16))
+REQUESTS_PER_SECOND = float(os.environ.get("RM_REQUESTS_PER_SECOND", 50))
+
+# Status codes that mean "slow down"
+THROTTLE_STATUS_CODES = {429, 503}
+
+# Only halve the limit once per this many seconds, so a burst of 429s from
+# requests that were already in flight counts as a single congestion signal
+DECREASE_COOLDOWN = 1.0
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """Parse a ``Retry-After`` header given as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Scheduler
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class RequestScheduler:
+    """Adaptive in-flight limit plus token-bucket rate limit.
+
+    Parameters
+    ----------
+    max_in_flight : Upper bound on concurrent requests; also the starting limit.
+    rate          : Sustained requests per second.
+    burst         : Token bucket capacity (default: ``max_in_flight``).
+    min_in_flight : Lower bound the limit can be cut down to (default 1).
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        rate: float = REQUESTS_PER_SECOND,
+        burst: int | None = None,
+        min_in_flight: int = 1,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min_in_flight
+        self.rate = rate
+        self.burst = burst or max_in_flight
+
+        self.limit = float(max_in_flight)
+        self.in_flight = 0
+
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+
+        self._slots = asyncio.Condition()
+        self._bucket = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait for a free slot under the current limit and a rate token."""
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        try:
+            await self._take_token()
+        except BaseException:
+            await self.release()
+            raise
+
+    async def release(self, status_code: int | None = None, retry_after: str | None = None) -> None:
+        """Free a slot and feed the response status into the AIMD controller.
+
+        ``status_code`` is ``None`` when the request failed without a response;
+        that neither grows nor shrinks the limit.
+        """
+        now = time.monotonic()
+        if status_code in THROTTLE_STATUS_CODES:
+            if now - self._last_decrease >= DECREASE_COOLDOWN:
+                self.limit = max(float(self.min_in_flight), self.limit / 2)
+                self._last_decrease = now
+            delay = retry_after_seconds(retry_after)
+            if delay:
+                self._paused_until = max(self._paused_until, now + delay)
+        elif status_code is not None:
+            self.limit = min(float(self.max_in_flight), self.limit + 1 / self.limit)
+
+        async with self._slots:
+            self.in_flight -= 1
+            self._slots.notify_all()
+
+    async def _take_token(self) -> None:
+        async with self._bucket:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(float(self.burst), self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# httpx integration
+# ──────────────────────────────────────────────────────────────────────────────
+
+if httpx is not None:
+
+    class _ReleasingStream(httpx.AsyncByteStream):
+        """Response body that hands its scheduler slot back once it is closed."""
+
+        def __init__(self, stream: httpx.AsyncByteStream, release) -> None:
+            self._stream = stream
+            self._release = release
+
+        async def __aiter__(self) -> AsyncIterator[bytes]:
+            async for chunk in self._stream:
+                yield chunk
+
+        async def aclose(self) -> None:
+            try:
+                await self._stream.aclose()
+            finally:
+                await self._release()
+
+
+    class SchedulingTransport(httpx.AsyncBaseTransport):
+        """Async transport that runs every request through a ``RequestScheduler``.
+
+        The slot is held until the response body has been read or closed, so a
+        streamed download counts as in flight for its whole duration.
+        """
+
+        def __init__(
+            self,
+            scheduler: RequestScheduler,
+            transport: httpx.AsyncBaseTransport | None = None,
+        ) -> None:
+            self.scheduler = scheduler
+            self._transport = transport or httpx.AsyncHTTPTransport()
+
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            await self.scheduler.acquire()
+            try:
+                response = await self._transport.handle_async_request(request)
+            except BaseException:
+                await self.scheduler.release()
+                raise
+
+            released = False
+
+            async def release() -> None:
+                nonlocal released
+                if not released:
+                    released = True
+                    await self.scheduler.release(response.status_code, response.headers.get("Retry-After"))
+
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=response.headers,
+                stream=_ReleasingStream(response.stream, release),
+                extensions=response.extensions,
+            )
+
+        async def aclose(self) -> None:
+            await self._transport.aclose()
@@ -0,0 +1,441 @@
+"""
+Table output — Raptor Maps API
+
+The reporting scripts write one row per anomaly or finding.  This module gives
+them one writer for each output format, so a BI tool can read typed columns
+without parsing and re-typing a CSV on every load:
+
+    • ``csv``     — the default, readable anywhere.
+    • ``parquet`` — typed, zstd-compressed columns.
+    • ``arrow``   — an Arrow IPC file.  It is left uncompressed so readers can
+      memory-map it and use the columns without copying them.
+
+Rows are buffered and written as one Parquet row group or Arrow record batch
+every ``RM_ROW_GROUP_SIZE`` rows, so exports are written as the data arrives
+and only one row group is held in memory.
+
+Rows can be flattened first (``flatten=True``): nested objects become dotted
+columns such as ``tag.tag``, and lists are written as JSON text.
+
+With ``extra_columns=True``, ``fieldnames`` are only the leading columns, and any
+other key is added as a column the first time it appears.  CSV rows are written
+straight to the file as they arrive; only if a later row brings a new column
+is the file rewritten once, at close, under the full header.  Only the rows
+written before the last new column are parsed and padded; the rest are copied
+as they are.  If the export fails (the table is closed with
+``completed=False``, as a ``with`` block does on an exception), the rows stay
+in ``<path>.part`` and nothing is written to ``path``.  A Parquet or Arrow
+file has a single schema, written with its first row group, so there the extra
+columns are the union of the keys in that group, with each type wide enough
+for every value in it (ints and floats together become float64).  A key that
+first appears after that group stops the export with ``ValueError`` instead of
+being dropped.
+
+Column types are given as names from ``COLUMN_TYPES`` (``"int64"``,
+``"float64"``, ``"string"``, …).  Columns without a type are inferred from the
+first row group; nested objects become struct columns.  Data is never dropped
+or truncated to fit the schema: a later row with a key outside it, or a value
+that does not fit its column's type, raises ``ValueError``.  When every column has
+a type the file is created up front, so an export with no rows still produces
+a file with the full schema.  Otherwise, as with a CSV whose header comes from
+the first row, nothing is written until the first row arrives.
+
+Parquet and Arrow need ``pyarrow`` (``pip install pyarrow``).  CSV does not.
+
+Environment Variables
+─────────────────────
+    RM_ROW_GROUP_SIZE      Rows per Parquet row group / Arrow record batch
+                           (default: 65536)
+
+USAGE:
+    from table_writer import OUTPUT_FORMATS, open_table
+
+    with open_table("findings", "parquet", fieldnames,
+                    column_types={"anomaly_count": "int64"}) as table:
+        for page in pages:
+            table.write_rows(page)
+    print(f"Wrote {table.rows} rows to {table.path}")
+"""
+
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+import os
+import shutil
+from typing import Iterable, Mapping, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for parquet and arrow output
+    pa = None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Constants
+# ──────────────────────────────────────────────────────────────────────────────
+
+OUTPUT_FORMATS = ("csv", "parquet", "arrow")
+
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+ROW_GROUP_SIZE = int(os.environ.get("RM_ROW_GROUP_SIZE", 64 * 1024))
+
+PARQUET_COMPRESSION = "zstd"
+
+# Type names accepted in ``column_types``
+COLUMN_TYPES = ("string", "int64", "float64", "bool", "timestamp")
+
+
+def _arrow_type(name: str):
+    if name == "timestamp":
+        # Timezone-aware datetimes, e.g. datetime.fromtimestamp(tsecs, tz=timezone.utc).
+        # Microseconds, so fractional timestamps are kept.
+        return pa.timestamp("us", tz="UTC")
+    if name not in COLUMN_TYPES:
+        raise ValueError(f"Unknown column type {name!r}, expected one of {COLUMN_TYPES}")
+    return pa.type_for_alias(name)
+
+
+def flatten_row(row: Mapping, prefix: str = "") -> dict:
+    """Flatten nested objects into dotted keys and lists into JSON text.
+
+    ``{"id": 1, "tag": {"tag": "Cell"}}`` -> ``{"id": 1, "tag.tag": "Cell"}``
+    """
+    flat = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, Mapping):
+            flat.update(flatten_row(value, f"{name}."))
+        elif isinstance(value, list):
+            flat[name] = json.dumps(value)
+        else:
+            flat[name] = value
+    return flat
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Writers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class _Table:
+    """Shared bookkeeping: ``path``, the ``rows`` written so far, optional
+    flattening, and use as a context manager that closes the file on exit,
+    passing ``completed=False`` if the block raised."""
+
+    def __init__(self, path: str, flatten: bool = False) -> None:
+        self.path = path
+        self.rows = 0
+        self._flatten = flatten
+
+    def write(self, row: Mapping) -> None:
+        if self._flatten:
+            row = flatten_row(row)
+        self._write(row)
+        self.rows += 1
+
+    def write_rows(self, rows: Iterable[Mapping]) -> None:
+        for row in rows:
+            self.write(row)
+
+    def write_columns(self, columns: Mapping[str, Sequence]) -> None:
+        """Write a batch given column by column, ``{name: [value, ...]}``.
+
+        The result is the same as writing the rows one at a time; the writers
+        below override this to skip building a dict per row.
+        """
+        names = list(columns)
+        self.write_rows(dict(zip(names, values)) for values in zip(*columns.values()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self.close(completed=exc_type is None)
+
+
+class CsvTable(_Table):
+    """CSV output through ``csv.DictWriter``.
+
+    Parameters
+    ----------
+    path          : Output file.
+    fieldnames    : Column order.  If omitted the columns are the keys of the
+                    first row, the file is only created once that row arrives,
+                    and later rows may add columns as with ``extra_columns``.
+    buffering     : Passed to ``open``.
+    flatten       : Flatten each row with ``flatten_row``.
+    extra_columns : Add keys missing from ``fieldnames`` as new columns instead
+                    of raising ``ValueError``.
+    """
+
+    def __init__(self, path: str, fieldnames: Sequence[str] | None = None,
+                 buffering: int = -1, flatten: bool = False,
+                 extra_columns: bool = False) -> None:
+        super().__init__(path, flatten)
+        self._buffering = buffering
+        self._extra_columns = extra_columns or fieldnames is None
+        self._file = None
+        self._writer = None
+        if fieldnames is not None:
+            self._open(fieldnames)
+
+    def _open(self, fieldnames: Iterable[str]) -> None:
+        # The writer is given self._columns itself, so columns appended to it
+        # later are written too. While columns can still be added the rows go to
+        # a .part file, which close() moves into place.
+        self._columns = list(fieldnames)
+        self._known = set(self._columns)
+        self._header_size = len(self._columns)
+        self._grown_at: tuple[int, int] | None = None
+        path = f"{self.path}.part" if self._extra_columns else self.path
+        self._file = open(path, "w", newline="", buffering=self._buffering)
+        self._writer = csv.DictWriter(self._file, fieldnames=self._columns)
+        self._records = csv.writer(self._file)
+        self._writer.writeheader()
+
+    def _add_columns(self, names: list[str]) -> None:
+        # Remember how many rows are shorter than the new header, and where the
+        # first row with the new width starts, so close() only has to pad those.
+        self._file.flush()
+        self._grown_at = (self.rows, self._file.buffer.tell())
+        self._columns.extend(names)
+        self._known.update(names)
+
+    def _write(self, row: Mapping) -> None:
+        if self._writer is None:
+            self._open(row.keys())
+        elif self._extra_columns and not self._known.issuperset(row.keys()):
+            self._add_columns([key for key in row.keys() if key not in self._known])
+        self._writer.writerow(row)
+
+    def write_columns(self, columns: Mapping[str, Sequence]) -> None:
+        if self._flatten:
+            super().write_columns(columns)
+            return
+        if self._writer is None:
+            self._open(columns.keys())
+        elif not self._known.issuperset(columns.keys()):
+            extra = [name for name in columns if name not in self._known]
+            if not self._extra_columns:
+                raise ValueError(f"dict contains fields not in fieldnames: {extra!r}")
+            self._add_columns(extra)
+        count = len(next(iter(columns.values()), ()))
+        blank = [""] * count
+        self._records.writerows(zip(*(columns.get(name, blank) for name in self._columns)))
+        self.rows += count
+
+    def _rewrite_header(self) -> None:
+        # Rows written before the last column appeared are shorter than the
+        # final header, so they are padded with empty fields. The rows after
+        # them already have every column and are copied byte for byte.
+        partial = f"{self.path}.part"
+        width = len(self._columns)
+        short_rows, offset = self._grown_at
+        with open(partial, newline="") as src, \
+                open(self.path, "w", newline="", buffering=self._buffering) as dst:
+            reader = csv.reader(src)
+            writer = csv.writer(dst)
+            next(reader)
+            writer.writerow(self._columns)
+            for record in itertools.islice(reader, short_rows):
+                record.extend([""] * (width - len(record)))
+                writer.writerow(record)
+            dst.flush()
+            with open(partial, "rb") as tail:
+                tail.seek(offset)
+                shutil.copyfileobj(tail, dst.buffer)
+        os.remove(partial)
+
+    def close(self, completed: bool = True) -> None:
+        """Finish the file.  With ``completed=False`` an ``extra_columns``
+        export is left in ``<path>.part`` rather than moved to ``path``."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if not self._extra_columns or not completed:
+            return
+        if len(self._columns) == self._header_size:
+            os.replace(f"{self.path}.part", self.path)
+        else:
+            self._rewrite_header()
+
+
+class ArrowTable(_Table):
+    """Parquet or Arrow IPC output, written one row group at a time.
+
+    Parameters
+    ----------
+    path           : Output file.
+    output_format  : ``"parquet"`` or ``"arrow"``.
+    fieldnames     : Column order.  If omitted the columns are those of the
+                     first row group.
+    column_types   : Column name -> type name from ``COLUMN_TYPES``.
+    row_group_size : Rows buffered before each write.
+    flatten        : Flatten each row with ``flatten_row``.
+    extra_columns  : Follow ``fieldnames`` with the other columns of the first
+                     row group.  Later new columns raise ``ValueError``.
+    """
+
+    def __init__(self, path: str, output_format: str,
+                 fieldnames: Sequence[str] | None = None,
+                 column_types: Mapping[str, str] | None = None,
+                 row_group_size: int = ROW_GROUP_SIZE, flatten: bool = False,
+                 extra_columns: bool = False) -> None:
+        if pa is None:
+            raise RuntimeError(f"{output_format} output needs pyarrow: pip install pyarrow")
+        super().__init__(path, flatten)
+        self.output_format = output_format
+        self.row_group_size = row_group_size
+        self._fieldnames = list(fieldnames) if fieldnames is not None else None
+        self._types = {name: _arrow_type(t) for name, t in (column_types or {}).items()}
+        self._extra_columns = extra_columns
+        self._schema = None
+        self._writer = None
+        self._pending: list[Mapping] = []
+        self._batches: list = []
+        self._batched = 0
+        if not extra_columns and self._fully_typed():
+            self._open(self._typed_schema())
+
+    def _fully_typed(self) -> bool:
+        return self._fieldnames is not None and all(name in self._types for name in self._fieldnames)
+
+    def _typed_schema(self):
+        return pa.schema([(name, self._types[name]) for name in self._fieldnames])
+
+    def _open(self, schema) -> None:
+        self._schema = schema
+        if self.output_format == "parquet":
+            self._writer = pq.ParquetWriter(self.path, schema, compression=PARQUET_COMPRESSION)
+        else:
+            self._writer = pa.ipc.new_file(self.path, schema)
+
+    def _infer_schema(self, rows: list[Mapping]):
+        # Every key seen in the group is a column, not just those of the first
+        # row. Columns that are null throughout would be typed null and could
+        # never hold a value; they are written as strings instead.
+        seen = list(dict.fromkeys(key for row in rows for key in row))
+        names = self._fieldnames if self._fieldnames is not None else seen
+        if self._extra_columns:
+            names = names + [name for name in seen if name not in names]
+        fields = []
+        for name in names:
+            if name in self._types:
+                fields.append(pa.field(name, self._types[name]))
+                continue
+            try:
+                inferred = pa.array([row.get(name) for row in rows]).type
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                raise ValueError(f"{self.path}: column {name!r} mixes types: {e}") from e
+            fields.append(pa.field(name, pa.string() if pa.types.is_null(inferred) else inferred))
+        return pa.schema(fields)
+
+    def _record_batch(self, columns: Mapping[str, Sequence], count: int):
+        # Each column is converted without a type and then cast with safe=True,
+        # so a value that does not fit the schema (3.5 in an int64 column, text
+        # in a float64 one) raises instead of being truncated. Columns missing
+        # from the batch are null; columns outside the schema raise too.
+        unknown = [name for name in columns if self._schema.get_field_index(name) < 0]
+        if unknown:
+            raise ValueError(
+                f"{self.path}: {unknown} are not columns of this file; its schema was "
+                "fixed when the first row group was written"
+            )
+        arrays = []
+        for field in self._schema:
+            values = columns.get(field.name)
+            try:
+                array = pa.array(values if values is not None else [None] * count)
+                arrays.append(array.cast(field.type, safe=True))
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+                raise ValueError(
+                    f"{self.path}: column {field.name!r} has a value that is not {field.type}: {e}"
+                ) from e
+        return pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+    def _stage(self, batch) -> None:
+        self._batches.append(batch)
+        self._batched += batch.num_rows
+
+    def _stage_rows(self) -> None:
+        if not self._pending:
+            return
+        if self._writer is None:
+            self._open(self._infer_schema(self._pending))
+        names = dict.fromkeys(key for row in self._pending for key in row)
+        columns = {name: [row.get(name) for row in self._pending] for name in names}
+        self._stage(self._record_batch(columns, len(self._pending)))
+        self._pending.clear()
+
+    def _flush(self, final: bool = True) -> None:
+        # Staged batches are joined and cut into row_group_size pieces, so the
+        # row groups do not depend on how the caller sized its batches. Unless
+        # this is the last flush, a short remainder stays staged for the next.
+        self._stage_rows()
+        count = self._batched if final else self._batched - self._batched % self.row_group_size
+        if not count:
+            return
+        table = pa.Table.from_batches(self._batches, schema=self._schema).combine_chunks()
+        if self.output_format == "parquet":
+            self._writer.write_table(table.slice(0, count), row_group_size=self.row_group_size)
+        else:
+            self._writer.write_table(table.slice(0, count), max_chunksize=self.row_group_size)
+        self._batches = table.slice(count).to_batches() if count < self._batched else []
+        self._batched -= count
+
+    def _write(self, row: Mapping) -> None:
+        self._pending.append(row)
+        if len(self._pending) + self._batched >= self.row_group_size:
+            self._flush(final=False)
+
+    def write_columns(self, columns: Mapping[str, Sequence]) -> None:
+        # Once the schema is known a batch is converted straight away, skipping
+        # the per-row dicts, and staged with the rows around it
+        if self._flatten or self._schema is None:
+            super().write_columns(columns)
+            return
+        self._stage_rows()
+        count = len(next(iter(columns.values()), ()))
+        self._stage(self._record_batch(columns, count))
+        self.rows += count
+        if self._batched >= self.row_group_size:
+            self._flush(final=False)
+
+    def close(self, completed: bool = True) -> None:
+        """Write the remaining rows and finish the file.  With
+        ``completed=False`` the rows still buffered are not written, so a
+        failed export does not raise again while closing."""
+        try:
+            if completed:
+                self._flush()
+                if self._writer is None and self._fully_typed():
+                    # No rows, but the columns are known: write the schema alone
+                    self._open(self._typed_schema())
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+
+
+def open_table(file_stem: str, output_format: str = "csv",
+               fieldnames: Sequence[str] | None = None,
+               column_types: Mapping[str, str] | None = None,
+               buffering: int = -1, flatten: bool = False,
+               extra_columns: bool = False) -> CsvTable | ArrowTable:
+    """Open ``<file_stem>.<ext>`` for writing in *output_format*.
+
+    ``column_types`` only applies to Parquet and Arrow, and ``buffering`` only
+    to CSV.  See ``CsvTable`` and ``ArrowTable`` for the other arguments.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+    path = f"{file_stem}{EXTENSIONS[output_format]}"
+    if output_format == "csv":
+        return CsvTable(path, fieldnames, buffering=buffering, flatten=flatten,
+                        extra_columns=extra_columns)
+    return ArrowTable(path, output_format, fieldnames, column_types, flatten=flatten,
+                      extra_columns=extra_columns)
@@ -0,0 +1,289 @@
+"""
+Shared OAuth token cache — Raptor Maps API
+
+Every example script authenticates with ``POST /oauth/token`` before doing
+anything else.  This module lets them share one access token across runs and
+across processes instead of requesting a fresh one every time:
+
+    • Tokens are cached on disk, keyed by client ID and audience.
+    • Expiry is read from the JWT ``exp`` claim (falling back to ``expires_in``).
+    • When a cached token is close to expiry it is still returned, and a
+      background thread fetches its replacement.
+    • Refreshes happen under an exclusive file lock, so concurrent processes
+      (e.g. a cron fleet) do not stampede the token endpoint.
+
+Environment Variables
+─────────────────────
+    RM_TOKEN_CACHE_DIR     Directory for cached tokens
+                           (default: ~/.cache/raptormaps/tokens)
+
+``TokenAuth`` attaches the token to every request of an httpx client, so a
+long-running script picks up the refreshed token instead of the one it
+started with.
+
+USAGE:
+    from token_cache import TokenAuth, get_token
+
+    token = get_token(client_id, client_secret)
+
+    async with httpx.AsyncClient(auth=TokenAuth(client_id, client_secret)) as client:
+        ...
+"""
+
+from __future__ import annotations
+
+import base64
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import httpx
+except ImportError:  # the requests-based scripts only use get_token
+    httpx = None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Constants
+# ──────────────────────────────────────────────────────────────────────────────
+
+AUTH_URL = "https://api.raptormaps.com/oauth/token"
+AUTH_AUDIENCE = "api://customer-api"
+
+CACHE_DIR = Path(
+    os.environ.get("RM_TOKEN_CACHE_DIR", Path.home() / ".cache" / "raptormaps" / "tokens")
+)
+
+# Start a background refresh this many seconds before the token expires
+REFRESH_MARGIN = 300
+
+# Never hand out a token with less than this many seconds left
+MIN_TTL = 30
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def _jwt_expiry(token: str) -> float | None:
+    """Return the ``exp`` claim of a JWT as a Unix timestamp, if present.
+
+    The signature is not verified — the expiry is only used to decide when
+    to refresh, and the API remains the authority on validity.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive, inter-process lock on *path* for the duration."""
+    with open(path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Token Provider
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class TokenProvider:
+    """Disk-cached, proactively refreshed access token for one client.
+
+    Parameters
+    ----------
+    client_id      : Raptor Maps API client ID.
+    client_secret  : Raptor Maps API client secret.
+    audience       : OAuth audience (default ``api://customer-api``).
+    cache_dir      : Directory holding the cache and lock files.
+    refresh_margin : Seconds before expiry at which a background refresh starts.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        audience: str = AUTH_AUDIENCE,
+        cache_dir: Path = CACHE_DIR,
+        refresh_margin: float = REFRESH_MARGIN,
+    ) -> None:
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.audience = audience
+        self.refresh_margin = refresh_margin
+
+        key = hashlib.sha256(f"{client_id}\0{audience}".encode()).hexdigest()[:32]
+        self._cache_path = Path(cache_dir) / f"{key}.json"
+        self._lock_path = Path(cache_dir) / f"{key}.lock"
+
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._mutex = threading.Lock()
+        self._refresh_thread: threading.Thread | None = None
+
+    def get_token(self) -> str:
+        """Return a valid access token, fetching one only when necessary."""
+        with self._mutex:
+            if self._remaining() < MIN_TTL:
+                self._adopt(self._read_cache())
+            if self._remaining() < MIN_TTL:
+                # Nothing usable to hand out, so callers wait for this one fetch
+                self._adopt(self._refresh())
+            elif self._remaining() < self.refresh_margin:
+                self._refresh_in_background()
+            return self._token  # type: ignore[return-value]
+
+    def _remaining(self) -> float:
+        return self._expires_at - time.time() if self._token else 0.0
+
+    def _adopt(self, cached: tuple[str, float] | None) -> None:
+        """Use *cached* if it outlives the token in memory. Caller holds ``_mutex``."""
+        if cached is not None and cached[1] > self._expires_at:
+            self._token, self._expires_at = cached
+
+    def _read_cache(self) -> tuple[str, float] | None:
+        """Return the on-disk token and its expiry, if there is one."""
+        try:
+            cached = json.loads(self._cache_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if not cached.get("access_token"):
+            return None
+        return cached["access_token"], float(cached.get("expires_at", 0))
+
+    def _refresh(self) -> tuple[str, float]:
+        """Return a token good for at least ``refresh_margin``, fetching one under
+        the file lock only if the cache does not already hold one.
+
+        Another process may have refreshed while we waited for the lock, so the
+        cache is re-read first.  Nothing here touches the in-memory token, so it
+        runs without ``_mutex``.
+        """
+        self._cache_path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        with _file_lock(self._lock_path):
+            cached = self._read_cache()
+            if cached is not None and cached[1] - time.time() >= self.refresh_margin:
+                return cached
+
+            token, expires_at = self._fetch()
+            tmp_path = self._cache_path.with_suffix(f".{os.getpid()}.tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"access_token": token, "expires_at": expires_at}, f)
+            os.replace(tmp_path, self._cache_path)
+            return token, expires_at
+
+    def _refresh_in_background(self) -> None:
+        """Refresh on a daemon thread while callers keep the current token.
+
+        The fetch runs without ``_mutex``, so ``get_token`` callers are never
+        held up by it; the new token is adopted once it arrives.
+        """
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+
+        def _run() -> None:
+            try:
+                refreshed = self._refresh()
+            except Exception as e:  # the current token is still valid; retry next call
+                print(f"WARNING: Background token refresh failed: {e}")
+                return
+            with self._mutex:
+                self._adopt(refreshed)
+
+        self._refresh_thread = threading.Thread(target=_run, daemon=True)
+        self._refresh_thread.start()
+
+    def _fetch(self) -> tuple[str, float]:
+        """Request a new token from ``POST /oauth/token``."""
+        body = json.dumps({
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "audience": self.audience,
+        }).encode()
+        request = urllib.request.Request(
+            AUTH_URL,
+            data=body,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                data = json.load(response)
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode(errors="replace")[:500] or "(no body)"
+            raise RuntimeError(f"[Authentication] HTTP {e.code}: {detail}") from e
+
+        token = data.get("access_token")
+        if not token:
+            raise RuntimeError("Authentication succeeded but no access_token in response")
+
+        expires_at = _jwt_expiry(token)
+        if expires_at is None:
+            expires_at = time.time() + float(data.get("expires_in", 0))
+        return token, expires_at
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Module-level convenience
+# ──────────────────────────────────────────────────────────────────────────────
+
+_providers: dict[tuple[str, str], TokenProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_token(client_id: str, client_secret: str, audience: str = AUTH_AUDIENCE) -> str:
+    """Return a cached access token for *client_id*, shared process-wide."""
+    with _providers_lock:
+        provider = _providers.get((client_id, audience))
+        if provider is None or provider.client_secret != client_secret:
+            provider = TokenProvider(client_id, client_secret, audience)
+            _providers[(client_id, audience)] = provider
+    return provider.get_token()
+
+
+if httpx is not None:
+
+    class TokenAuth(httpx.Auth):
+        """httpx auth that sets ``Authorization: Bearer`` from ``get_token`` on
+        every request, so requests made after a refresh use the new token."""
+
+        def __init__(self, client_id: str, client_secret: str, audience: str = AUTH_AUDIENCE) -> None:
+            self.client_id = client_id
+            self.client_secret = client_secret
+            self.audience = audience
+
+        def auth_flow(self, request: httpx.Request):
+            token = get_token(self.client_id, self.client_secret, self.audience)
+            request.headers["Authorization"] = f"Bearer {token}"
+            yield request
@@ -51,39 +51,128 @@ USAGE:
     RM_API_CLIENT_ID=<your_client_id> RM_API_CLIENT_SECRET=<your_client_secret> RM_ORG_ID=<your_org_id> \\
         python upload_files_from_local.py --image-dir ./my_images --order-id <your_order_id>
 
+    # Resume an interrupted run (the session ID is printed at Step 4):
+    python upload_files_from_local.py --image-dir /path/to/images --resume <upload_session_id>
+
+    # Wait for ingestion of several earlier runs at once:
+    python upload_files_from_local.py --watch <upload_session_id> <upload_session_id> ...
+
     # Additional options:
     python upload_files_from_local.py \\
         --image-dir /path/to/images \\
         --order-id <your_order_id> \\
         --poll-interval 30 \\
         --poll-timeout 1800
+
+    # Nested per-flight folders, skipping thumbnail directories:
+    python upload_files_from_local.py \\
+        --image-dir /mnt/drone_dumps/site_42 \\
+        --order-id <your_order_id> \\
+        --exclude '*/thumbnails' \\
+        --scan-workers 16
+
+    # Large radiometric batches: 16 MB parts, 4 parts per file, 50 MB/s total
+    python upload_files_from_local.py \\
+        --image-dir /path/to/images \\
+        --order-id <your_order_id> \\
+        --multipart-chunk-mb 16 \\
+        --part-concurrency 4 \\
+        --max-upload-mbps 50
 """
 
 from __future__ import annotations
 
 import argparse
 import asyncio
+import fnmatch
+import hashlib
 import json
 import os
+import random
 import sys
+import threading
 import time
-from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
 
 import boto3
+import botocore.session
 import requests
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.credentials import CredentialProvider, CredentialResolver, RefreshableCredentials
+from requests.adapters import HTTPAdapter
+
+from token_cache import get_token
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Constants
 # ──────────────────────────────────────────────────────────────────────────────
 
 BASE_URL = "https://api.raptormaps.com"
-AUTH_URL = f"{BASE_URL}/oauth/token"
 AUTH_AUDIENCE = "api://customer-api"
 
 # Image file extensions we'll upload (case-insensitive)
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
 
+# Directories listed in parallel while discovering images (overridable on the CLI)
+DEFAULT_SCAN_WORKERS = 8
+
+# Default S3 multipart settings (overridable on the CLI)
+DEFAULT_MULTIPART_CHUNK_MB = 8
+DEFAULT_PART_CONCURRENCY = 4
+
+# Where upload journals are kept (one file per upload session), along with
+# the content-hash index used to skip duplicate images
+DEFAULT_JOURNAL_DIR = ".rm_upload_journals"
+HASH_INDEX_FILE = "hash_index.json"
+
+# Read size used when hashing files for duplicate detection
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Default connection settings for the Raptor Maps API (overridable on the CLI)
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 30
+
+# Ingestion status polling: the first checks are this many seconds apart, and
+# the gap grows by POLL_BACKOFF per idle check up to --poll-interval
+POLL_MIN_INTERVAL = 2.0
+POLL_BACKOFF = 1.5
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# HTTP Session
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Every step of a run shares one keep-alive session, so status polling and the
+# other API calls reuse pooled connections instead of opening a new TCP+TLS
+# connection per request. requests speaks HTTP/1.1 only; connections are reused
+# rather than multiplexed. Nothing here goes through the on-disk cache in
+# http_cache.py: orders carry upload access tokens, and credentials and status
+# must always be current.
+_session = requests.Session()
+_timeout: tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+_pool_size = DEFAULT_POOL_SIZE
+
+
+def configure_session(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+) -> requests.Session:
+    """Size the shared session's connection pool and set request timeouts."""
+    global _timeout, _pool_size
+    _session.mount(BASE_URL, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+    _timeout = (connect_timeout, read_timeout)
+    _pool_size = pool_size
+    return _session
+
+
+configure_session()
+
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Helpers
@@ -98,14 +187,189 @@ def _headers(token: str) -> dict[str, str]:
     }
 
 
-def _collect_image_files(directory: Path) -> list[Path]:
-    """Return a sorted list of image files in *directory* (non-recursive)."""
-    files = [
-        f
-        for f in sorted(directory.iterdir())
-        if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS
-    ]
-    return files
+def _matches(rel_path: str, patterns: Sequence[str]) -> bool:
+    """Return True if *rel_path* (POSIX, relative to the image dir) matches any glob."""
+    return any(fnmatch.fnmatchcase(rel_path, p) for p in patterns)
+
+
+def _scan_directory(
+    root: Path,
+    directory: str,
+    include: Sequence[str],
+    exclude: Sequence[str],
+) -> tuple[list[Path], list[str]]:
+    """List one directory and split it into matching image files and subdirectories.
+
+    ``DirEntry.is_file`` / ``is_dir`` are answered from the directory listing on
+    most local filesystems and only fall back to a ``stat`` call on filesystems
+    that do not report entry types (many network mounts); that is the cost the
+    thread pool in ``_iter_image_files`` spreads across directories.
+    """
+    files: list[Path] = []
+    subdirs: list[str] = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            rel_path = Path(entry.path).relative_to(root).as_posix()
+            if exclude and _matches(rel_path, exclude):
+                continue
+            if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                if entry.is_file() and (not include or _matches(rel_path, include)):
+                    files.append(Path(entry.path))
+            elif entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+    files.sort()
+    return files, subdirs
+
+
+def _iter_image_files(
+    directory: Path,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    scan_workers: int = DEFAULT_SCAN_WORKERS,
+) -> Iterator[Path]:
+    """Yield image files under *directory*, recursively, as they are found.
+
+    Directories are listed on a pool of *scan_workers* threads, so on slow
+    (network) filesystems many listings and stats are in flight at once, and
+    each directory's files are yielded as soon as its listing completes —
+    callers can start uploading long before the walk finishes.  Files come out
+    sorted within a directory; directories come out in completion order.
+
+    Parameters
+    ----------
+    directory    : Root image directory.
+    include      : Globs a file's path relative to *directory* must match (default: all).
+    exclude      : Globs for files or directories to skip; an excluded directory
+                   is not descended into.
+    scan_workers : Directories listed in parallel (default 8).
+
+    Symlinked directories are not followed, so a link cycle cannot make the
+    walk run forever.
+    """
+    root = directory
+    with ThreadPoolExecutor(max_workers=scan_workers) as pool:
+        pending = {pool.submit(_scan_directory, root, str(root), include, exclude)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                for subdir in subdirs:
+                    pending.add(pool.submit(_scan_directory, root, subdir, include, exclude))
+                yield from files
+
+
+class _ByteRateLimiter:
+    """Token bucket that caps the combined upload rate of every S3 transfer.
+
+    Passed to ``upload_file`` as its ``Callback``.  s3transfer invokes the
+    callback from the thread that is reading the file into the request body,
+    so sleeping here slows that part down without any extra threads.
+    """
+
+    def __init__(self, bytes_per_second: float) -> None:
+        self.rate = bytes_per_second
+        self._allowance = bytes_per_second
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount: int) -> None:
+        # s3transfer reports negative amounts when it rewinds a part to retry it
+        if bytes_amount <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.rate, self._allowance + (now - self._last) * self.rate)
+            self._last = now
+            self._allowance -= bytes_amount
+            wait = -self._allowance / self.rate if self._allowance < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+def _s3_key(prefix: str, file_path: Path, root: Path | None = None) -> str:
+    """Return the S3 key a local file is uploaded to.
+
+    Files in subdirectories of *root* are flattened into the session prefix
+    with ``__`` in place of ``/`` (``flight_02/IMG_0001.JPG`` becomes
+    ``flight_02__IMG_0001.JPG``), so same-named images from different flights
+    do not overwrite each other.  Top-level files keep their plain name.
+    """
+    if root is None:
+        return f"{prefix}{file_path.name}"
+    return f"{prefix}{file_path.relative_to(root).as_posix().replace('/', '__')}"
+
+
+def _utc_expiry(expiration) -> str:
+    """Return *expiration* as a timezone-aware UTC ISO 8601 string.
+
+    botocore compares the expiry with an aware ``datetime``, so a naive value
+    from the API (taken to be UTC) would fail with ``TypeError`` on its first
+    refresh check.
+    """
+    if isinstance(expiration, datetime):
+        expires = expiration
+    elif isinstance(expiration, (int, float)):
+        expires = datetime.fromtimestamp(expiration, tz=timezone.utc)
+    else:
+        expires = datetime.fromisoformat(str(expiration).replace("Z", "+00:00"))
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=timezone.utc)
+    return expires.astimezone(timezone.utc).isoformat()
+
+
+class _UploadCredentialProvider(CredentialProvider):
+    """Hands botocore one fixed ``RefreshableCredentials`` object."""
+
+    METHOD = "raptor-maps-aws-credentials"
+    CANONICAL_NAME = "RaptorMapsAwsCredentials"
+
+    def __init__(self, credentials: RefreshableCredentials) -> None:
+        super().__init__()
+        self._upload_credentials = credentials
+
+    def load(self) -> RefreshableCredentials:
+        return self._upload_credentials
+
+
+def _boto3_session(
+    creds: dict,
+    refresh_credentials: Callable[[], dict] | None = None,
+) -> boto3.Session:
+    """Return a boto3 session for the scoped upload credentials in *creds*.
+
+    With *refresh_credentials*, the session uses botocore's
+    ``RefreshableCredentials``: shortly before ``expiration`` botocore calls it
+    for a new set, and every request signed after that uses the new keys.
+    Requests already in flight are unaffected, so transfers keep running.
+    The credentials reach botocore through its public ``credential_provider``
+    component rather than by setting the session's credentials directly.
+    """
+    if refresh_credentials is None:
+        return boto3.Session(
+            aws_access_key_id=creds["access_key_id"],
+            aws_secret_access_key=creds["secret_access_key"],
+            aws_session_token=creds["session_token"],
+        )
+
+    def _metadata(c: dict) -> dict:
+        return {
+            "access_key": c["access_key_id"],
+            "secret_key": c["secret_access_key"],
+            "token": c["session_token"],
+            "expiry_time": _utc_expiry(c["expiration"]),
+        }
+
+    credentials = RefreshableCredentials.create_from_metadata(
+        metadata=_metadata(creds),
+        refresh_using=lambda: _metadata(refresh_credentials()),
+        method=_UploadCredentialProvider.METHOD,
+    )
+    botocore_session = botocore.session.get_session()
+    botocore_session.register_component(
+        "credential_provider",
+        CredentialResolver(providers=[_UploadCredentialProvider(credentials)]),
+    )
+    return boto3.Session(botocore_session=botocore_session)
 
 
 def _raise_for_status(response: requests.Response, step_name: str) -> None:
@@ -115,6 +379,193 @@ def _raise_for_status(response: requests.Response, step_name: str) -> None:
         raise RuntimeError(f"[{step_name}] HTTP {response.status_code}: {detail}")
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Upload Journal
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class UploadJournal:
+    """Append-only record of an upload session, used to resume interrupted runs.
+
+    The journal is a JSON Lines file named ``{upload_session_id}.jsonl``.  The
+    first line describes the session (upload request token, file total, AWS
+    credentials); every following line records one file that finished
+    uploading, with its S3 key and local size.  Each line is flushed as soon as
+    it is written, so a crash loses at most the uploads that were in flight.
+
+    The file holds temporary credentials and is created with mode 0600.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, journal_dir: str, session: dict) -> UploadJournal:
+        """Start a journal for a new upload session."""
+        path = Path(journal_dir) / f"{session['upload_session_id']}.jsonl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps({"type": "session", **session}) + "\n")
+        return cls(path)
+
+    @classmethod
+    def load(cls, journal_dir: str, upload_session_id: int) -> tuple[UploadJournal, dict, dict[str, dict]]:
+        """Read an existing journal.
+
+        Returns
+        -------
+        (journal, session, completed) — the journal to keep appending to, the
+        latest session record, and the completed files keyed by S3 key.
+        """
+        path = Path(journal_dir) / f"{upload_session_id}.jsonl"
+        if not path.is_file():
+            raise RuntimeError(f"No upload journal found at {path}")
+
+        session: dict = {}
+        completed: dict[str, dict] = {}
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if record.get("type") == "session":
+                    session = record
+                elif record.get("type") == "file":
+                    completed[record["key"]] = record
+        return cls(path), session, completed
+
+    def record_session(self, session: dict) -> None:
+        """Append an updated session record (e.g. refreshed credentials)."""
+        self._append({"type": "session", **session})
+
+    def record_file(self, key: str, size: int) -> None:
+        """Append a completed upload."""
+        self._append({"type": "file", "key": key, "size": size})
+
+    def _append(self, record: dict) -> None:
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def list_uploaded_objects(
+    creds: dict,
+    refresh_credentials: Callable[[], dict] | None = None,
+) -> dict[str, int] | None:
+    """Return ``{key: size}`` for objects already under the session prefix.
+
+    Scoped upload credentials may not allow ``ListBucket``; in that case
+    ``None`` is returned and the journal alone decides what to skip.
+    """
+    s3_client = _boto3_session(creds, refresh_credentials).client("s3")
+
+    uploaded: dict[str, int] = {}
+    try:
+        paginator = s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=creds["bucket"], Prefix=creds["prefix"]):
+            for obj in page.get("Contents", []):
+                uploaded[obj["Key"]] = obj["Size"]
+    except Exception as e:
+        print(f"   WARNING: Could not list s3://{creds['bucket']}/{creds['prefix']} ({e})")
+        print("   Falling back to the upload journal only.")
+        return None
+    return uploaded
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Duplicate Detection
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class HashIndex:
+    """Content hashes of local files, cached across runs.
+
+    Entries are keyed by absolute path and reused only while the file's size
+    and modification time are unchanged, so a rerun over the same directory
+    hashes nothing it has already hashed.  Stored as JSON in the journal
+    directory.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            self._entries: dict[str, dict] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def digest(self, file_path: Path, stat: os.stat_result) -> str:
+        """Return the content hash of *file_path*, from the index when still valid."""
+        key = str(file_path)
+        entry = self._entries.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["hash"]
+
+        h = hashlib.blake2b(digest_size=16)
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self._entries[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+            self._dirty = True
+        return digest
+
+    def save(self) -> None:
+        """Write the index back to disk if anything was hashed."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def deduplicate_images(
+    image_files: list[Path],
+    index: HashIndex,
+    workers: int = DEFAULT_SCAN_WORKERS,
+) -> tuple[list[Path], dict[Path, Path]]:
+    """Drop files whose content is identical to another file in *image_files*.
+
+    Only files that share their size with another file can be duplicates, so
+    every file is stat'ed but only those size collisions are hashed (streamed,
+    on *workers* threads).  Of each set of identical files the one with the
+    smallest path is kept.
+
+    Returns
+    -------
+    (unique, duplicates) — the files to upload, in their original order, and
+    a ``{duplicate: kept file}`` map of the ones skipped.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        stats = list(pool.map(os.stat, image_files))
+        by_size: dict[int, list[tuple[Path, os.stat_result]]] = {}
+        for fp, st in zip(image_files, stats):
+            by_size.setdefault(st.st_size, []).append((fp, st))
+        candidates = sorted(
+            (pair for group in by_size.values() if len(group) > 1 for pair in group),
+            key=lambda pair: pair[0],
+        )
+        digests = list(pool.map(lambda pair: index.digest(*pair), candidates))
+    index.save()
+
+    kept: dict[str, Path] = {}
+    duplicates: dict[Path, Path] = {}
+    for (fp, _), digest in zip(candidates, digests):
+        if digest in kept:
+            duplicates[fp] = kept[digest]
+        else:
+            kept[digest] = fp
+    unique = [fp for fp in image_files if fp not in duplicates]
+    return unique, duplicates
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Step 1: Get API JWT
 # ──────────────────────────────────────────────────────────────────────────────
@@ -135,6 +586,9 @@ def get_api_token(client_id: str, client_secret: str) -> str:
         "audience":      "api://customer-api"
     }
 
+    The token is served from the shared on-disk cache in ``token_cache`` when
+    a valid one exists, so repeated runs only hit the endpoint near expiry.
+
     Returns
     -------
     str — The access token (JWT) used as a Bearer token for all subsequent calls.
@@ -143,24 +597,7 @@ def get_api_token(client_id: str, client_secret: str) -> str:
     """
     print("=== Step 1: Authenticate (Get API JWT) ===")
 
-    payload = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "audience": AUTH_AUDIENCE,
-    }
-
-    response = requests.post(
-        AUTH_URL,
-        headers={"Content-Type": "application/json"},
-        data=json.dumps(payload),
-        timeout=30,
-    )
-    _raise_for_status(response, "Authentication")
-
-    data = response.json()
-    token = data.get("access_token")
-    if not token:
-        raise RuntimeError("Authentication succeeded but no access_token in response")
+    token = get_token(client_id, client_secret, AUTH_AUDIENCE)
 
     print(f"Authenticated successfully (token starts with {token[:12]}...)")
     return token
@@ -190,11 +627,11 @@ def get_order_access_token(token: str, org_id: int, order_id: int) -> str:
 
     endpoint = f"{BASE_URL}/v2/orders/{order_id}"
 
-    response = requests.get(
+    response = _session.get(
         endpoint,
         headers=_headers(token),
         params={"org_id": org_id},
-        timeout=30,
+        timeout=_timeout,
     )
     _raise_for_status(response, "Fetch Order")
 
@@ -256,11 +693,11 @@ def create_upload_session(
     if name:
         body["name"] = name
 
-    response = requests.post(
+    response = _session.post(
         endpoint,
         headers=_headers(token),
         data=json.dumps(body),
-        timeout=30,
+        timeout=_timeout,
     )
     _raise_for_status(response, "Create Upload Session")
 
@@ -281,6 +718,20 @@ def create_upload_session(
 # ──────────────────────────────────────────────────────────────────────────────
 
 
+def _fetch_aws_credentials(token: str, access_token: str, upload_session_id: int) -> dict:
+    """Request a set of scoped AWS credentials (also used to refresh them)."""
+    endpoint = f"{BASE_URL}/v2/token/{access_token}/upload_session/{upload_session_id}/aws_credentials"
+
+    response = _session.get(
+        endpoint,
+        headers=_headers(token),
+        timeout=_timeout,
+    )
+    _raise_for_status(response, "Get AWS Credentials")
+
+    return response.json()
+
+
 def get_aws_credentials(
     token: str,
     access_token: str,
@@ -309,16 +760,7 @@ def get_aws_credentials(
     """
     print("\n=== Step 4: Get AWS Credentials ===")
 
-    endpoint = f"{BASE_URL}/v2/token/{access_token}/upload_session/{upload_session_id}/aws_credentials"
-
-    response = requests.get(
-        endpoint,
-        headers=_headers(token),
-        timeout=30,
-    )
-    _raise_for_status(response, "Get AWS Credentials")
-
-    creds = response.json()
+    creds = _fetch_aws_credentials(token, access_token, upload_session_id)
 
     print("Received scoped AWS credentials")
     print(f"   Bucket     : {creds['bucket']}")
@@ -339,24 +781,77 @@ async def _upload_one(
     bucket: str,
     s3_key: str,
     idx: int,
-    total: int,
-    semaphore: asyncio.Semaphore,
+    total: int | None,
+    transfer_config: TransferConfig,
+    rate_limiter: _ByteRateLimiter | None,
+    journal: UploadJournal | None,
 ) -> None:
-    """Upload a single file inside a concurrency-limited semaphore."""
-    async with semaphore:
-        print(f"   Uploading {idx}/{total}: {file_path.name} -> s3://{bucket}/{s3_key}")
-        await asyncio.to_thread(s3_client.upload_file, str(file_path), bucket, s3_key)
+    """Upload a single file on a worker thread.
+
+    The journal records the size read before the upload started, so no extra
+    request (which the scoped credentials may not allow) is needed afterwards.
+    """
+
+    def _upload() -> None:
+        size = file_path.stat().st_size
+        s3_client.upload_file(
+            str(file_path),
+            bucket,
+            s3_key,
+            Config=transfer_config,
+            Callback=rate_limiter,
+        )
+        if journal is not None:
+            journal.record_file(s3_key, size)
+
+    print(f"   Uploading {idx}/{total or '?'}: {file_path.name} -> s3://{bucket}/{s3_key}")
+    await asyncio.to_thread(_upload)
+
+
+def _credentials_refresher(
+    client_id: str,
+    client_secret: str,
+    access_token: str,
+    upload_session_id: int,
+    journal: UploadJournal,
+    journal_session: dict,
+) -> Callable[[], dict]:
+    """Build the callback botocore uses to renew the scoped AWS credentials.
+
+    The API token is looked up again on every refresh (it may itself have
+    expired during a long upload), and the new credentials are journaled so a
+    later ``--resume`` starts from them.
+    """
+
+    def refresh() -> dict:
+        print("   Refreshing AWS credentials before they expire ...")
+        token = get_token(client_id, client_secret, AUTH_AUDIENCE)
+        creds = _fetch_aws_credentials(token, access_token, upload_session_id)
+        journal_session["credentials"] = creds
+        journal.record_session(journal_session)
+        print(f"   New credentials expire at {creds['expiration']}")
+        return creds
+
+    return refresh
 
 
 def upload_images(
-    image_files: list[Path],
+    image_files: Iterable[Path],
     bucket: str,
     prefix: str,
     access_key_id: str,
     secret_access_key: str,
     session_token: str,
     max_concurrency: int = 10,
-) -> None:
+    multipart_chunk_mb: int = DEFAULT_MULTIPART_CHUNK_MB,
+    part_concurrency: int = DEFAULT_PART_CONCURRENCY,
+    max_upload_mbps: float | None = None,
+    journal: UploadJournal | None = None,
+    expiration: str | None = None,
+    refresh_credentials: Callable[[], dict] | None = None,
+    root: Path | None = None,
+    total: int | None = None,
+) -> int:
     """Upload local image files to S3 concurrently using asyncio.
 
     Creates a boto3 S3 client from the temporary credentials returned by
@@ -366,41 +861,113 @@ def upload_images(
 
     Files are uploaded concurrently (up to *max_concurrency* at a time)
     using ``asyncio.to_thread`` so that multiple S3 PutObject calls run
-    in parallel.
+    in parallel.  *image_files* is consumed lazily on a background thread,
+    so it can be a generator such as ``_iter_image_files``: uploads start
+    with the first file it yields while the rest are still being found.
+    Files larger than *multipart_chunk_mb* are sent as a multipart upload
+    with up to *part_concurrency* parts in flight, so at most
+    ``max_concurrency * part_concurrency`` part uploads (and threads) run
+    at once.  *max_upload_mbps* caps the combined rate of all of them.
 
     Parameters
     ----------
-    image_files       : List of local file paths to upload.
+    image_files       : Local file paths to upload (any iterable, read lazily).
     bucket            : S3 bucket name (from AwsCredentialsResponse).
     prefix            : S3 key prefix (from AwsCredentialsResponse).
     access_key_id     : Temporary AWS access key ID.
     secret_access_key : Temporary AWS secret access key.
     session_token     : Temporary AWS session token.
     max_concurrency   : Maximum number of parallel uploads (default 10).
+    multipart_chunk_mb: Multipart threshold and part size in MB (default 8).
+    part_concurrency  : Parts uploaded in parallel per file (default 4).
+    max_upload_mbps   : Combined upload rate limit in MB/s (default: unlimited).
+    journal           : Upload journal to record each completed file in.
+    expiration        : Expiry of the temporary credentials (from AwsCredentialsResponse).
+    refresh_credentials: Callable returning a fresh AwsCredentialsResponse. When
+                        given (with *expiration*), the S3 client renews its
+                        credentials before they expire, so multi-hour uploads
+                        do not fail partway through.
+    root              : Image directory the files were found under; nested files
+                        get flattened keys (see ``_s3_key``).
+    total             : Number of files, for progress output, if known up front.
+
+    Returns
+    -------
+    int  Number of files uploaded.
     """
     print("\n=== Step 5: Upload Images to S3 ===")
-    print(f"   Max concurrency: {max_concurrency}")
-
-    session = boto3.Session(
-        aws_access_key_id=access_key_id,
-        aws_secret_access_key=secret_access_key,
-        aws_session_token=session_token,
+    print(f"   Max concurrency: {max_concurrency} files x {part_concurrency} parts")
+    print(f"   Part size      : {multipart_chunk_mb} MB")
+    if max_upload_mbps:
+        print(f"   Rate limit     : {max_upload_mbps} MB/s")
+
+    session = _boto3_session(
+        {
+            "access_key_id": access_key_id,
+            "secret_access_key": secret_access_key,
+            "session_token": session_token,
+            "expiration": expiration,
+        },
+        refresh_credentials if expiration else None,
     )
-    s3_client = session.client("s3")
-
-    total = len(image_files)
-    semaphore = asyncio.Semaphore(max_concurrency)
-
-    async def _upload_all() -> None:
-        tasks = [
-            _upload_one(s3_client, fp, bucket, f"{prefix}{fp.name}", idx, total, semaphore)
-            for idx, fp in enumerate(image_files, start=1)
-        ]
-        await asyncio.gather(*tasks)
-
-    asyncio.run(_upload_all())
-
-    print(f"All {total} images uploaded successfully")
+    # One pooled connection per part that can be in flight at once
+    s3_client = session.client(
+        "s3",
+        config=Config(max_pool_connections=max_concurrency * part_concurrency),
+    )
+    chunk_size = multipart_chunk_mb * 1024 * 1024
+    transfer_config = TransferConfig(
+        multipart_threshold=chunk_size,
+        multipart_chunksize=chunk_size,
+        max_concurrency=part_concurrency,
+    )
+    rate_limiter = _ByteRateLimiter(max_upload_mbps * 1024 * 1024) if max_upload_mbps else None
+
+    async def _upload_all() -> int:
+        # A bounded queue between the (possibly slow) file iterator and a fixed
+        # pool of upload workers: uploads start with the first file, and only a
+        # few discovered-but-not-yet-uploaded paths are held in memory.
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency * 2)
+        errors: list[BaseException] = []
+
+        def _produce() -> None:
+            try:
+                for item in enumerate(image_files, start=1):
+                    if errors:
+                        break
+                    asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            finally:
+                for _ in range(max_concurrency):
+                    asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+        async def _worker() -> int:
+            uploaded = 0
+            while (item := await queue.get()) is not None:
+                if errors:
+                    continue  # keep draining so the producer never blocks
+                idx, fp = item
+                try:
+                    await _upload_one(
+                        s3_client, fp, bucket, _s3_key(prefix, fp, root), idx, total,
+                        transfer_config, rate_limiter, journal,
+                    )
+                    uploaded += 1
+                except Exception as e:
+                    errors.append(e)
+            return uploaded
+
+        producer = asyncio.create_task(asyncio.to_thread(_produce))
+        counts = await asyncio.gather(*(_worker() for _ in range(max_concurrency)))
+        await producer
+        if errors:
+            raise errors[0]
+        return sum(counts)
+
+    uploaded = asyncio.run(_upload_all())
+
+    print(f"All {uploaded} images uploaded successfully")
+    return uploaded
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -439,14 +1006,14 @@ def trigger_ingestion(
 
     endpoint = f"{BASE_URL}/v2/token/{access_token}/ingest"
 
-    response = requests.post(
+    response = _session.post(
         endpoint,
         headers=_headers(token),
         data=json.dumps({
             "upload_session_id": upload_session_id,
             "file_total": file_total,
         }),
-        timeout=30,
+        timeout=_timeout,
     )
     _raise_for_status(response, "Trigger Ingestion")
 
@@ -462,55 +1029,54 @@ def trigger_ingestion(
 # ──────────────────────────────────────────────────────────────────────────────
 
 
-def poll_status(
+def _get_status(token: str, access_token: str, org_id: int, upload_session_id: int) -> dict:
+    """Fetch one upload session's status over the shared keep-alive session."""
+    endpoint = f"{BASE_URL}/v2/token/{access_token}/upload_sessions/{upload_session_id}/status"
+    response = _session.get(
+        endpoint,
+        headers=_headers(token),
+        params={"org_id": org_id},
+        timeout=_timeout,
+    )
+    _raise_for_status(response, "Poll Status")
+    return response.json()
+
+
+async def watch_upload_session(
     token: str,
     access_token: str,
     org_id: int,
     upload_session_id: int,
-    poll_interval: int = 30,
-    poll_timeout: int = 1800,
+    poll_interval: float = 30,
+    poll_timeout: float = 1800,
+    request_slots: asyncio.Semaphore | None = None,
+    label: str = "",
 ) -> dict:
-    """Poll the upload session status until ingestion is complete or timeout.
+    """Wait for one upload session to finish ingesting.
 
-    Endpoint
-    --------
-    GET {base_url}/v2/token/{access_token}/upload_sessions/{upload_session_id}/status?org_id={org_id}
-
-    Response Fields
-    ───────────────
-    upload_session_status : int — 0 = complete, 1 = in progress
-    n_images              : int — number of RGB images processed
-    n_thermal_images      : int — number of radiometric thermal images processed
-    n_tile_maps           : int — number of tile maps generated
-    errors                : list — any processing errors
-    file_total            : int — total files expected
-
-    Parameters
-    ----------
-    poll_interval : Seconds between status checks (default 30).
-    poll_timeout  : Maximum seconds to wait before giving up (default 1800 = 30 min).
+    The first checks come every ``POLL_MIN_INTERVAL`` seconds.  While the
+    processed count stays the same the interval grows by ``POLL_BACKOFF`` up
+    to *poll_interval*; any progress holds it where it is.  Every wait is
+    jittered by ±20% so sessions watched together do not poll in lockstep.
+    Elapsed time is read from a monotonic clock, so slow responses count
+    against *poll_timeout* too.
 
     Returns
     -------
-    dict — The final status response.
-
-    Reference: https://docs.raptormaps.com/reference/apiv2upload_sessionupload_session_idstatus
+    dict — The final status response (the last one seen on timeout).
     """
-    print("\n=== Step 7: Poll Ingestion Status ===")
+    start = time.monotonic()
+    interval = min(POLL_MIN_INTERVAL, poll_interval)
+    last_processed = None
+
+    while True:
+        if request_slots is None:
+            data = await asyncio.to_thread(_get_status, token, access_token, org_id, upload_session_id)
+        else:
+            async with request_slots:
+                data = await asyncio.to_thread(_get_status, token, access_token, org_id, upload_session_id)
+        elapsed = time.monotonic() - start
 
-    endpoint = f"{BASE_URL}/v2/token/{access_token}/upload_sessions/{upload_session_id}/status"
-    elapsed = 0
-
-    while elapsed < poll_timeout:
-        response = requests.get(
-            endpoint,
-            headers=_headers(token),
-            params={"org_id": org_id},
-            timeout=30,
-        )
-        _raise_for_status(response, "Poll Status")
-
-        data = response.json()
         status_code = data.get("upload_session_status", 1)
         n_images = data.get("n_images", 0)
         n_thermal = data.get("n_thermal_images", 0)
@@ -520,30 +1086,112 @@ def poll_status(
 
         processed = n_images + n_thermal + n_tile_maps
         print(
-            f"   [{elapsed:>4}s] Status: {'COMPLETE' if status_code == 0 else 'IN PROGRESS'} "
+            f"   {label}[{elapsed:>4.0f}s] Status: {'COMPLETE' if status_code == 0 else 'IN PROGRESS'} "
             f"| Processed: {processed}/{file_total} "
             f"(RGB: {n_images}, Thermal: {n_thermal}, Tile Maps: {n_tile_maps}) "
             f"| Errors: {len(errors)}"
         )
 
         if status_code == 0:
-            print("Ingestion complete!")
+            print(f"{label}Ingestion complete!")
             if errors:
                 print(f"   WARNING: {len(errors)} error(s) occurred during processing:")
                 for err in errors[:5]:  # Show first 5
                     print(f"      - {err}")
             return data
 
-        time.sleep(poll_interval)
-        elapsed += poll_interval
+        remaining = poll_timeout - elapsed
+        if remaining <= 0:
+            break
+        if processed == last_processed:
+            interval = min(poll_interval, interval * POLL_BACKOFF)
+        last_processed = processed
+        await asyncio.sleep(min(remaining, interval * random.uniform(0.8, 1.2)))
 
-    print(f"Timed out after {poll_timeout}s — ingestion is still in progress.")
+    print(f"{label}Timed out after {poll_timeout}s — ingestion is still in progress.")
     print(
         "   You can re-run the status check later or view progress in the Raptor App."
     )
     return data
 
 
+async def watch_upload_sessions(
+    token: str,
+    org_id: int,
+    sessions: dict[int, str],
+    poll_interval: float = 30,
+    poll_timeout: float = 1800,
+) -> dict[int, dict]:
+    """Watch several upload sessions at once until each finishes or times out.
+
+    Parameters
+    ----------
+    sessions      : ``{upload_session_id: upload_request access token}``.
+    poll_interval : Longest wait between status checks of one session (default 30).
+    poll_timeout  : Maximum seconds to wait for each session (default 1800 = 30 min).
+
+    Each session is reported as soon as its own ``upload_session_status`` is 0.
+    All requests share the module's keep-alive session, with no more in
+    flight than it keeps pooled connections.
+
+    Returns
+    -------
+    dict — The final status response of each session, keyed by session ID.
+    """
+    request_slots = asyncio.Semaphore(_pool_size)
+    results = await asyncio.gather(*(
+        watch_upload_session(
+            token, access_token, org_id, upload_session_id,
+            poll_interval, poll_timeout, request_slots,
+            label=f"[session {upload_session_id}] " if len(sessions) > 1 else "",
+        )
+        for upload_session_id, access_token in sessions.items()
+    ))
+    return dict(zip(sessions, results))
+
+
+def poll_status(
+    token: str,
+    access_token: str,
+    org_id: int,
+    upload_session_id: int,
+    poll_interval: int = 30,
+    poll_timeout: int = 1800,
+) -> dict:
+    """Poll the upload session status until ingestion is complete or timeout.
+
+    Endpoint
+    --------
+    GET {base_url}/v2/token/{access_token}/upload_sessions/{upload_session_id}/status?org_id={org_id}
+
+    Response Fields
+    ───────────────
+    upload_session_status : int — 0 = complete, 1 = in progress
+    n_images              : int — number of RGB images processed
+    n_thermal_images      : int — number of radiometric thermal images processed
+    n_tile_maps           : int — number of tile maps generated
+    errors                : list — any processing errors
+    file_total            : int — total files expected
+
+    Parameters
+    ----------
+    poll_interval : Longest wait between status checks (default 30); checks start
+                    faster and back off to this (see ``watch_upload_session``).
+    poll_timeout  : Maximum seconds to wait before giving up (default 1800 = 30 min).
+
+    Returns
+    -------
+    dict — The final status response.
+
+    Reference: https://docs.raptormaps.com/reference/apiv2upload_sessionupload_session_idstatus
+    """
+    print("\n=== Step 7: Poll Ingestion Status ===")
+    results = asyncio.run(watch_upload_sessions(
+        token, org_id, {upload_session_id: access_token}, poll_interval, poll_timeout,
+    ))
+    return results[upload_session_id]
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Main
 # ──────────────────────────────────────────────────────────────────────────────
@@ -569,8 +1217,43 @@ def main() -> int:
     parser.add_argument(
         "--image-dir",
         type=str,
-        required=True,
-        help="Path to directory containing images to upload",
+        default=None,
+        help="Path to directory containing images to upload (required unless --watch)",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help=(
+            "Only upload images whose path relative to --image-dir matches this glob "
+            "(e.g. 'flight_*/*'); may be repeated"
+        ),
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Skip files or directories matching this glob (e.g. '*/thumbnails'); may be repeated",
+    )
+    parser.add_argument(
+        "--scan-workers",
+        type=int,
+        default=DEFAULT_SCAN_WORKERS,
+        help=(
+            "Threads used to list directories and to hash files for --dedup "
+            f"(default: {DEFAULT_SCAN_WORKERS})"
+        ),
+    )
+    parser.add_argument(
+        "--no-dedup",
+        dest="dedup",
+        action="store_false",
+        help=(
+            "Upload every file, even ones with identical content "
+            "(by default duplicates, e.g. an SD card copied twice, are skipped)"
+        ),
     )
     parser.add_argument(
         "--session-name",
@@ -581,8 +1264,35 @@ def main() -> int:
     parser.add_argument(
         "--order-id",
         type=int,
-        required=True,
-        help="Order ID to fetch the upload_request access token from",
+        default=None,
+        help="Order ID to fetch the upload_request access token from (required unless --resume)",
+    )
+    parser.add_argument(
+        "--resume",
+        type=int,
+        default=None,
+        metavar="UPLOAD_SESSION_ID",
+        help=(
+            "Resume an interrupted run: reuse its upload session and credentials "
+            "and upload only the files that are not in S3 yet"
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        type=int,
+        nargs="+",
+        default=None,
+        metavar="UPLOAD_SESSION_ID",
+        help=(
+            "Upload nothing; wait for ingestion of these earlier upload sessions "
+            "(read from their journals) and report each as it completes"
+        ),
+    )
+    parser.add_argument(
+        "--journal-dir",
+        type=str,
+        default=DEFAULT_JOURNAL_DIR,
+        help=f"Directory for upload journals used by --resume (default: {DEFAULT_JOURNAL_DIR})",
     )
     parser.add_argument(
         "--max-concurrency",
@@ -590,11 +1300,32 @@ def main() -> int:
         default=6,
         help="Maximum number of parallel S3 uploads (default: 10)",
     )
+    parser.add_argument(
+        "--multipart-chunk-mb",
+        type=int,
+        default=DEFAULT_MULTIPART_CHUNK_MB,
+        help=(
+            "Files larger than this many MB are uploaded in parts of this size "
+            f"(default: {DEFAULT_MULTIPART_CHUNK_MB})"
+        ),
+    )
+    parser.add_argument(
+        "--part-concurrency",
+        type=int,
+        default=DEFAULT_PART_CONCURRENCY,
+        help=f"Parts of a single file uploaded in parallel (default: {DEFAULT_PART_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--max-upload-mbps",
+        type=float,
+        default=None,
+        help="Cap on the combined S3 upload rate in MB/s across all files (default: unlimited)",
+    )
     parser.add_argument(
         "--poll-interval",
         type=int,
         default=30,
-        help="Seconds between status polling requests (default: 30)",
+        help="Longest wait between status checks; early checks come faster (default: 30)",
     )
     parser.add_argument(
         "--poll-timeout",
@@ -602,8 +1333,32 @@ def main() -> int:
         default=1800,
         help="Maximum seconds to poll before giving up (default: 1800 = 30 min)",
     )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help=f"Connections kept open to the Raptor Maps API (default: {DEFAULT_POOL_SIZE})",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=DEFAULT_CONNECT_TIMEOUT,
+        help=f"Seconds to wait for an API connection (default: {DEFAULT_CONNECT_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=DEFAULT_READ_TIMEOUT,
+        help=f"Seconds to wait for an API response (default: {DEFAULT_READ_TIMEOUT})",
+    )
 
     args = parser.parse_args()
+    if args.watch is None:
+        if args.image_dir is None:
+            parser.error("--image-dir is required unless --watch is given")
+        if args.order_id is None and args.resume is None:
+            parser.error("--order-id is required unless --resume or --watch is given")
+    configure_session(args.pool_size, args.connect_timeout, args.read_timeout)
 
     # ── Read environment variables ────────────────────────────────────────
     client_id = os.environ.get("RM_API_CLIENT_ID")
@@ -626,17 +1381,38 @@ def main() -> int:
 
     org_id = int(org_id_str)  # type: ignore[arg-type]
 
+    # ── Watch earlier sessions only ───────────────────────────────────────
+    if args.watch:
+        try:
+            sessions = {
+                upload_session_id: UploadJournal.load(args.journal_dir, upload_session_id)[1]["access_token"]
+                for upload_session_id in args.watch
+            }
+            token = get_api_token(client_id, client_secret)  # type: ignore[arg-type]
+            print(f"\n=== Watch Ingestion Status: {len(sessions)} session(s) ===")
+            asyncio.run(watch_upload_sessions(
+                token, org_id, sessions, args.poll_interval, args.poll_timeout,
+            ))
+        except RuntimeError as e:
+            print(f"\nERROR: {e}")
+            return 1
+        return 0
+
     # ── Discover image files ──────────────────────────────────────────────
     image_dir = Path(args.image_dir).resolve()
     if not image_dir.is_dir():
         print(f"ERROR: Image directory does not exist: {image_dir}")
         return 1
 
-    image_files = _collect_image_files(image_dir)
-    if not image_files:
-        print(f"ERROR: No image files found in {image_dir}")
-        print(f"   Supported extensions: {', '.join(sorted(IMAGE_EXTENSIONS))}")
-        return 1
+    def discover_images() -> Iterator[Path]:
+        return _iter_image_files(image_dir, args.include, args.exclude, args.scan_workers)
+
+    def collect_images(dedup: bool) -> tuple[list[Path], dict[Path, Path]]:
+        image_files = list(discover_images())
+        if not dedup:
+            return image_files, {}
+        index = HashIndex(Path(args.journal_dir) / HASH_INDEX_FILE)
+        return deduplicate_images(image_files, index, args.scan_workers)
 
     session_name = args.session_name or f"Upload Session {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
 
@@ -645,55 +1421,144 @@ def main() -> int:
     print("=" * 55)
     print(f"   Org ID      : {org_id}")
     print(f"   Image Dir   : {image_dir}")
-    print(f"   Images Found: {len(image_files)}")
+    if args.include:
+        print(f"   Include     : {', '.join(args.include)}")
+    if args.exclude:
+        print(f"   Exclude     : {', '.join(args.exclude)}")
     print(f"   Session Name: {session_name}")
-    print(f"   Order ID    : {args.order_id}")
+    if args.resume:
+        print(f"   Resuming    : upload session {args.resume}")
+    else:
+        print(f"   Order ID    : {args.order_id}")
     print("=" * 55)
 
+    # A new upload session needs the file count up front, so the directory walk
+    # runs in the background while we authenticate and fetch the order. A resumed
+    # session already has its count and streams files straight into the upload.
+    scan_pool = ThreadPoolExecutor(max_workers=1)
+    scan = None if args.resume else scan_pool.submit(collect_images, args.dedup)
+    scan_pool.shutdown(wait=False)
+
     try:
         # Step 1: Authenticate
         token = get_api_token(client_id, client_secret)  # type: ignore[arg-type]
 
-        # Step 2: Fetch Order → get upload_request access token
-        upload_request_token = get_order_access_token(
-            token=token,
-            org_id=org_id,
-            order_id=args.order_id,
-        )
-
-        # Step 3: Create Upload Session
-        upload_session = create_upload_session(
-            token=token,
-            access_token=upload_request_token,
-            file_total=len(image_files),
-            name=session_name,
-        )
-        upload_session_id = upload_session["id"]
-
-        # Step 4: Get AWS Credentials
-        creds = get_aws_credentials(
-            token=token,
-            access_token=upload_request_token,
-            upload_session_id=upload_session_id,
-        )
+        if args.resume:
+            # Steps 2–4 were completed by the interrupted run; reuse its session
+            print(f"\n=== Resume Upload Session {args.resume} ===")
+            journal, journal_session, completed = UploadJournal.load(args.journal_dir, args.resume)
+            journal_session.pop("type", None)
+            upload_request_token = journal_session["access_token"]
+            upload_session_id = journal_session["upload_session_id"]
+            file_total = journal_session["file_total"]
+            creds = journal_session["credentials"]
+            refresh_credentials = _credentials_refresher(
+                client_id, client_secret, upload_request_token, upload_session_id,  # type: ignore[arg-type]
+                journal, journal_session,
+            )
+
+            # S3 is the authority when we can list it, otherwise trust the journal
+            uploaded = list_uploaded_objects(creds, refresh_credentials)
+            if uploaded is None:
+                uploaded = {key: record["size"] for key, record in completed.items()}
+
+            def not_uploaded(fp: Path) -> bool:
+                return uploaded.get(_s3_key(creds["prefix"], fp, image_dir)) != fp.stat().st_size
+
+            print(f"   Already uploaded: {len(uploaded)} of {file_total}")
+            if journal_session.get("dedup"):
+                # Skip the same duplicates as the original run; the hash index
+                # makes this a stat pass rather than a rehash
+                image_files, _ = collect_images(dedup=True)
+                pending_files = [fp for fp in image_files if not_uploaded(fp)]
+                pending_total = len(pending_files)
+            else:
+                pending_files = (fp for fp in discover_images() if not_uploaded(fp))
+                pending_total = None
+        else:
+            # Step 2: Fetch Order → get upload_request access token
+            upload_request_token = get_order_access_token(
+                token=token,
+                org_id=org_id,
+                order_id=args.order_id,
+            )
+
+            image_files, duplicates = scan.result()
+            if not image_files:
+                raise RuntimeError(
+                    f"No image files found in {image_dir} "
+                    f"(supported extensions: {', '.join(sorted(IMAGE_EXTENSIONS))})"
+                )
+            print(f"\n   Images found: {len(image_files) + len(duplicates)}")
+            if duplicates:
+                print(f"   Duplicates  : {len(duplicates)} skipped (identical content), e.g.")
+                for duplicate, original in list(duplicates.items())[:5]:
+                    print(f"      - {duplicate.relative_to(image_dir)} = {original.relative_to(image_dir)}")
+
+            # Step 3: Create Upload Session
+            file_total = len(image_files)
+            upload_session = create_upload_session(
+                token=token,
+                access_token=upload_request_token,
+                file_total=file_total,
+                name=session_name,
+            )
+            upload_session_id = upload_session["id"]
+
+            # Step 4: Get AWS Credentials
+            creds = get_aws_credentials(
+                token=token,
+                access_token=upload_request_token,
+                upload_session_id=upload_session_id,
+            )
+
+            journal_session = {
+                "upload_session_id": upload_session_id,
+                "order_id": args.order_id,
+                "access_token": upload_request_token,
+                "file_total": file_total,
+                "image_dir": str(image_dir),
+                "dedup": args.dedup,
+                "credentials": creds,
+            }
+            journal = UploadJournal.create(args.journal_dir, journal_session)
+            print(f"   Journal    : {journal.path} (rerun with --resume {upload_session_id})")
+            refresh_credentials = _credentials_refresher(
+                client_id, client_secret, upload_request_token, upload_session_id,  # type: ignore[arg-type]
+                journal, journal_session,
+            )
+            pending_files = image_files
+            pending_total = file_total
 
         # Step 5: Upload Images to S3 (concurrent via asyncio)
         upload_images(
-            image_files=image_files,
+            image_files=pending_files,
             bucket=creds["bucket"],
             prefix=creds["prefix"],
             access_key_id=creds["access_key_id"],
             secret_access_key=creds["secret_access_key"],
             session_token=creds["session_token"],
             max_concurrency=args.max_concurrency,
+            multipart_chunk_mb=args.multipart_chunk_mb,
+            part_concurrency=args.part_concurrency,
+            max_upload_mbps=args.max_upload_mbps,
+            journal=journal,
+            expiration=creds["expiration"],
+            refresh_credentials=refresh_credentials,
+            root=image_dir,
+            total=pending_total,
         )
 
+        # The upload can outlast the token from Step 1; the cache returns it
+        # unchanged if it is still valid
+        token = get_token(client_id, client_secret, AUTH_AUDIENCE)  # type: ignore[arg-type]
+
         # Step 6: Trigger Ingestion
         trigger_ingestion(
             token=token,
             access_token=upload_request_token,
             upload_session_id=upload_session_id,
-            file_total=len(image_files),
+            file_total=file_total,
         )
 
         # Step 7: Poll Ingestion Status
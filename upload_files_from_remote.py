@@ -66,29 +66,127 @@ USAGE:
             "https://your-bucket.s3.amazonaws.com/image002.jpg?<signature_params>" \\
         --order-id <your_order_id> \\
         --session-name "My Upload Session"
+
+    # Check every URL first (needs: pip install httpx):
+    python upload_files_from_remote.py \\
+        --urls-file urls.txt \\
+        --order-id <your_order_id> \\
+        --session-name "My Upload Session" \\
+        --preflight
+
+    # Continue after a failure; batches recorded in the manifest are skipped:
+    python upload_files_from_remote.py \\
+        --urls-file urls.txt \\
+        --order-id <your_order_id> \\
+        --session-name "My Upload Session" \\
+        --resume
+
+    # Gzip-compressed URL lists are read directly; --dedup-urls drops repeats:
+    python upload_files_from_remote.py \\
+        --urls-file urls.txt.gz \\
+        --order-id <your_order_id> \\
+        --session-name "My Upload Session" \\
+        --dedup-urls
+
+    # Large URL lists: 8 batches in flight, at most 60 batches a minute
+    python upload_files_from_remote.py \\
+        --urls-file urls.txt \\
+        --order-id <your_order_id> \\
+        --session-name "My Upload Session" \\
+        --max-in-flight 8 \\
+        --requests-per-window 60
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import gzip
+import hashlib
+import itertools
 import json
 import os
+import random
 import sys
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from scheduler import retry_after_seconds
+from token_cache import get_token
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Constants
 # ──────────────────────────────────────────────────────────────────────────────
 
 BASE_URL = "https://api.raptormaps.com"
-AUTH_URL = f"{BASE_URL}/oauth/token"
 AUTH_AUDIENCE = "api://customer-api"
 
 # Maximum URLs per request (docs recommend ≤ 1000)
 MAX_URLS_PER_REQUEST = 1000
 
+# Default connection settings for the Raptor Maps API (overridable on the CLI)
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+
+# Default pacing of batch submissions (overridable on the CLI): at most
+# DEFAULT_REQUESTS_PER_WINDOW requests per DEFAULT_RATE_WINDOW seconds, with
+# no more than DEFAULT_MAX_IN_FLIGHT outstanding at once
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_REQUESTS_PER_WINDOW = 20
+DEFAULT_RATE_WINDOW = 60.0
+DEFAULT_BATCH_RETRIES = 5
+
+# Where each submitted batch is recorded, so an interrupted run can be resumed
+DEFAULT_MANIFEST_FILE = "ingestor_upload_manifest.jsonl"
+
+# Pre-flight URL checks (optional): requests in flight and per-request timeout
+DEFAULT_PREFLIGHT_CONCURRENCY = 200
+PREFLIGHT_TIMEOUT = 15.0
+
+# Content types storage services report for objects uploaded without one;
+# these are not flagged as "not an image" by the pre-flight check
+GENERIC_CONTENT_TYPES = {"", "application/octet-stream", "binary/octet-stream"}
+
+# Responses that mean "try this batch again later".  Creating a session is not
+# idempotent, so only statuses that say the request was turned away are retried;
+# a 500/502/504 may come after the session was already created.
+RETRY_STATUS_CODES = {429, 503}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# HTTP Session
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Every request of a run shares one keep-alive session, so batches reuse pooled
+# connections instead of opening a new TCP+TLS connection each time. requests
+# speaks HTTP/1.1 only; connections are reused rather than multiplexed.
+_session = requests.Session()
+_timeout: tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+
+
+def configure_session(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+) -> requests.Session:
+    """Size the shared session's connection pool and set request timeouts."""
+    global _timeout
+    _session.mount(BASE_URL, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+    _timeout = (connect_timeout, read_timeout)
+    return _session
+
+
+configure_session()
+
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Helpers
@@ -110,18 +208,358 @@ def _raise_for_status(response: requests.Response, step_name: str) -> None:
         raise RuntimeError(f"[{step_name}] HTTP {response.status_code}: {detail}")
 
 
-def load_urls_from_file(filepath: str) -> list[str]:
-    """Read signed URLs from a text file (one URL per line).
+def _never_sent(error: requests.ConnectionError) -> bool:
+    """Return True if *error* happened before the request reached the server."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class _RateLimiter:
+    """Thread-safe limit on request rate and concurrency.
 
-    Blank lines and lines starting with ``#`` are ignored.
+    At most *requests_per_window* requests may start in any sliding window of
+    *window* seconds, and at most *max_in_flight* may be outstanding at once.
+    ``pause`` holds back every new request, e.g. until a ``Retry-After`` has
+    passed.
     """
-    urls: list[str] = []
-    with open(filepath) as f:
+
+    def __init__(self, requests_per_window: int, window: float, max_in_flight: int) -> None:
+        self.requests_per_window = requests_per_window
+        self.window = window
+        self.max_in_flight = max_in_flight
+        self._started: deque[float] = deque()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until a request may start."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._started and now - self._started[0] >= self.window:
+                    self._started.popleft()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._in_flight >= self.max_in_flight:
+                    wait = None  # until a release
+                elif len(self._started) >= self.requests_per_window:
+                    wait = self._started[0] + self.window - now
+                else:
+                    self._started.append(now)
+                    self._in_flight += 1
+                    return
+                self._cond.wait(wait)
+
+    def release(self) -> None:
+        """Mark a request as finished."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Start no new requests for *seconds*."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+
+def iter_urls_from_file(filepath: str) -> Iterator[str]:
+    """Yield signed URLs from a text file (one URL per line), one at a time.
+
+    Blank lines and lines starting with ``#`` are ignored.  Gzip-compressed
+    files (e.g. ``urls.txt.gz``) are detected from their header and
+    decompressed on the fly, so the file is never held in memory.
+    """
+    with open(filepath, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    opener = gzip.open if compressed else open
+    with opener(filepath, "rt") as f:
         for line in f:
             stripped = line.strip()
             if stripped and not stripped.startswith("#"):
-                urls.append(stripped)
-    return urls
+                yield stripped
+
+
+class UrlDeduplicator:
+    """Drop URLs that point at an object already seen.
+
+    Two signed URLs for the same object differ only in their query string
+    (the signature and expiry), so URLs are compared without it.  Only an
+    8-byte hash of each URL is kept, in a set of ints, which costs well under
+    100 bytes per URL however long the signed URLs are.  With 64-bit hashes the
+    chance of any false match among n URLs is about n² / 2^65: roughly 1 in
+    370,000 for 10 million URLs.
+    """
+
+    def __init__(self) -> None:
+        self._seen: set[int] = set()
+        self.skipped = 0
+
+    def filter(self, urls: Iterable[str]) -> Iterator[str]:
+        for url in urls:
+            key = hashlib.blake2b(url.split("?", 1)[0].encode(), digest_size=8).digest()
+            digest = int.from_bytes(key, "big")
+            if digest in self._seen:
+                self.skipped += 1
+                continue
+            self._seen.add(digest)
+            yield url
+
+
+def iter_batches(urls: Iterable[str], batch_size: int = MAX_URLS_PER_REQUEST) -> Iterator[list[str]]:
+    """Yield lists of up to *batch_size* URLs, reading *urls* only as far as needed."""
+    urls = iter(urls)
+    while batch := list(itertools.islice(urls, batch_size)):
+        yield batch
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Submission Manifest
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def _batch_hash(batch: list[str]) -> str:
+    """Fingerprint a batch by the objects its URLs point at.
+
+    Query strings are left out, so a batch still matches after its URLs have
+    been re-signed (e.g. because the originals expired before a resume).
+    """
+    h = hashlib.sha256()
+    for url in batch:
+        h.update(url.split("?", 1)[0].encode())
+        h.update(b"\n")
+    return h.hexdigest()[:32]
+
+
+class IngestorManifest:
+    """Append-only record of submitted batches, used to resume interrupted runs.
+
+    The manifest is a JSON Lines file.  The first line describes the run
+    (order ID, session name); every following line records one batch that
+    the server accepted — its index, URL count, URL hash, and the returned
+    ``upload_session_id`` / ``upload_session_uuid``.  Each line is flushed as
+    soon as the batch succeeds, so a crash never loses a created session.
+
+    Once every batch has been submitted the manifest is renamed to
+    ``<manifest>.done`` (see ``finish``), so the next run in the same directory
+    starts a fresh one.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.completed: dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str, order_id: int, session_name: str, resume: bool) -> IngestorManifest:
+        """Start a new manifest, or load an existing one when *resume* is set."""
+        manifest = cls(Path(path))
+        # A manifest with only its run line (a run that failed before any batch
+        # was accepted) holds nothing to resume and can be started over.
+        run = manifest._load() if manifest.path.is_file() else None
+        if not resume:
+            if manifest.completed:
+                raise RuntimeError(
+                    f"{path} records an unfinished run. Pass --resume to skip the "
+                    "batches it already submitted, or choose another --manifest to start over."
+                )
+            manifest.path.unlink(missing_ok=True)
+            manifest._append({"type": "run", "order_id": order_id, "session_name": session_name})
+            return manifest
+
+        if run is None:
+            if manifest.done_path.is_file():
+                raise RuntimeError(
+                    f"No unfinished run at {path}; the last run completed ({manifest.done_path})"
+                )
+            raise RuntimeError(f"No ingestor manifest found at {path}")
+        if run.get("order_id") != order_id:
+            raise RuntimeError(f"{path} belongs to order {run.get('order_id')}, not {order_id}")
+        return manifest
+
+    def _load(self) -> dict:
+        """Read the recorded batches into ``completed`` and return the run record."""
+        run: dict = {}
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if record.get("type") == "run":
+                    run = record
+                elif record.get("type") == "batch":
+                    self.completed[record["batch"]] = record
+        return run
+
+    def record_batch(self, batch_num: int, url_count: int, url_hash: str, result: dict) -> None:
+        """Append a batch the server accepted."""
+        record = {
+            "type": "batch",
+            "batch": batch_num,
+            "url_count": url_count,
+            "url_hash": url_hash,
+            "upload_session_id": result.get("upload_session_id"),
+            "upload_session_uuid": result.get("upload_session_uuid"),
+        }
+        self._append(record)
+        with self._lock:
+            self.completed[batch_num] = record
+
+    @property
+    def done_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.done")
+
+    def finish(self) -> None:
+        """Retire the manifest after every batch was submitted."""
+        os.replace(self.path, self.done_path)
+
+    def results(self) -> list[dict]:
+        """Return the recorded sessions in batch order."""
+        with self._lock:
+            return [self.completed[n] for n in sorted(self.completed)]
+
+    def _append(self, record: dict) -> None:
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Pre-flight Validation
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class PreflightReport:
+    """Tally of pre-flight results, with a few example URLs per problem."""
+
+    PROBLEMS = {
+        "expired": "expired or forbidden (HTTP 400/401/403)",
+        "missing": "missing (HTTP 404/410)",
+        "not_image": "not an image",
+        "failed": "failed (other status or network error)",
+    }
+    MAX_EXAMPLES = 5
+
+    def __init__(self) -> None:
+        self.checked = 0
+        self.counts = {problem: 0 for problem in self.PROBLEMS}
+        self.examples: dict[str, list[str]] = {problem: [] for problem in self.PROBLEMS}
+        self.total_bytes = 0
+        self.unknown_size = 0
+
+    def add(self, url: str, problem: str | None, size: int | None, detail: str) -> None:
+        self.checked += 1
+        if size is None:
+            self.unknown_size += 1
+        else:
+            self.total_bytes += size
+        if problem is not None:
+            self.counts[problem] += 1
+            if len(self.examples[problem]) < self.MAX_EXAMPLES:
+                # Never print the signature part of the URL
+                self.examples[problem].append(f"{url.split('?', 1)[0]} ({detail})")
+
+    @property
+    def blocking(self) -> int:
+        """URLs Raptor Maps would fail to download."""
+        return self.counts["expired"] + self.counts["missing"] + self.counts["failed"]
+
+    def print(self) -> None:
+        print(f"   Checked       : {self.checked} URL(s)")
+        print(f"   OK            : {self.checked - sum(self.counts.values())}")
+        for problem, label in self.PROBLEMS.items():
+            if self.counts[problem]:
+                print(f"   {self.counts[problem]} {label}, e.g.")
+                for example in self.examples[problem]:
+                    print(f"      - {example}")
+        estimate = f"{self.total_bytes / 1024 ** 3:.2f} GB"
+        if self.unknown_size:
+            estimate += f" (size unknown for {self.unknown_size} URL(s))"
+        print(f"   Total size    : {estimate}")
+
+
+def _classify_probe(status_code: int, headers) -> tuple[str | None, int | None, str]:
+    """Turn the response to a 1-byte range request into (problem, size, detail)."""
+    if status_code in (400, 401, 403):
+        return "expired", None, f"HTTP {status_code}"
+    if status_code in (404, 410):
+        return "missing", None, f"HTTP {status_code}"
+    if status_code == 416:
+        # Not even one byte to return: the object is empty
+        return "not_image", 0, "empty object"
+    if status_code not in (200, 206):
+        return "failed", None, f"HTTP {status_code}"
+
+    size = None
+    content_range = headers.get("content-range", "")
+    if "/" in content_range and not content_range.endswith("/*"):
+        size = int(content_range.rsplit("/", 1)[1])
+    elif status_code == 200 and headers.get("content-length"):
+        size = int(headers["content-length"])
+
+    content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if not content_type.startswith("image/") and content_type not in GENERIC_CONTENT_TYPES:
+        return "not_image", size, f"Content-Type {content_type}"
+    return None, size, "ok"
+
+
+def preflight_urls(
+    urls: Iterable[str],
+    concurrency: int = DEFAULT_PREFLIGHT_CONCURRENCY,
+) -> PreflightReport:
+    """Check that every signed URL can be downloaded, before submitting any.
+
+    Each URL gets a ``GET`` for its first byte (``Range: bytes=0-0``).  A
+    ``HEAD`` would be cheaper, but URLs presigned for ``GET`` are usually
+    rejected for any other method.  The body is never read, so even servers
+    that ignore the range cost only the response headers.  Up to
+    *concurrency* requests run at once on one pooled async client, fed from
+    *urls* as they complete, so 100k+ URLs take minutes and little memory.
+
+    Needs ``httpx`` (``pip install httpx``); it is only imported when the
+    check runs.
+
+    Returns
+    -------
+    PreflightReport — counts of expired/forbidden, missing, non-image and
+    failed URLs, with examples, and the total size from ``Content-Range``.
+    """
+    try:
+        import httpx
+    except ImportError as e:
+        raise RuntimeError("--preflight needs httpx: pip install httpx") from e
+
+    report = PreflightReport()
+    url_iter = iter(urls)
+
+    async def _probe(client: httpx.AsyncClient, url: str) -> tuple[str | None, int | None, str]:
+        try:
+            async with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as res:
+                return _classify_probe(res.status_code, res.headers)
+        except httpx.HTTPError as e:
+            return "failed", None, type(e).__name__
+
+    async def _worker(client: httpx.AsyncClient) -> None:
+        # Workers share one iterator, so URLs are read only as fast as they are checked
+        for url in url_iter:
+            problem, size, detail = await _probe(client, url)
+            report.add(url, problem, size, detail)
+            if report.checked % 10_000 == 0:
+                print(f"   ... {report.checked} checked")
+
+    async def _run() -> None:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        transport = httpx.AsyncHTTPTransport(limits=limits, retries=1)
+        async with httpx.AsyncClient(
+            transport=transport, timeout=PREFLIGHT_TIMEOUT, follow_redirects=True,
+        ) as client:
+            await asyncio.gather(*(_worker(client) for _ in range(concurrency)))
+
+    asyncio.run(_run())
+    return report
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -144,6 +582,9 @@ def get_api_token(client_id: str, client_secret: str) -> str:
         "audience":      "api://customer-api"
     }
 
+    The token is served from the shared on-disk cache in ``token_cache`` when
+    a valid one exists, so repeated runs only hit the endpoint near expiry.
+
     Returns
     -------
     str — The access token (JWT) used as a Bearer token for all subsequent calls.
@@ -152,24 +593,7 @@ def get_api_token(client_id: str, client_secret: str) -> str:
     """
     print("=== Step 1: Authenticate (Get API JWT) ===")
 
-    payload = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "audience": AUTH_AUDIENCE,
-    }
-
-    response = requests.post(
-        AUTH_URL,
-        headers={"Content-Type": "application/json"},
-        data=json.dumps(payload),
-        timeout=30,
-    )
-    _raise_for_status(response, "Authentication")
-
-    data = response.json()
-    token = data.get("access_token")
-    if not token:
-        raise RuntimeError("Authentication succeeded but no access_token in response")
+    token = get_token(client_id, client_secret, AUTH_AUDIENCE)
 
     print(f"Authenticated successfully (token starts with {token[:12]}...)")
     return token
@@ -180,13 +604,72 @@ def get_api_token(client_id: str, client_secret: str) -> str:
 # ──────────────────────────────────────────────────────────────────────────────
 
 
+def _submit_batch(
+    token: str,
+    org_id: int,
+    body: dict,
+    batch_num: int,
+    limiter: _RateLimiter,
+    max_retries: int,
+) -> dict:
+    """POST one batch of URLs, retrying when the server asks us to back off.
+
+    429 and 503 responses and connections that could not be opened are
+    retried up to *max_retries* times.  A ``Retry-After`` header pauses every
+    batch, not just this one; without one the batch waits with exponential
+    backoff.  Any other failure, including a connection dropped or a read
+    timing out after the request was sent, is not retried, since the server
+    may already have created the session.
+    """
+    endpoint = f"{BASE_URL}/v2/ingestor/upload_sessions"
+    step_name = f"Create Ingestor Upload Session (batch {batch_num})"
+
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            response = _session.post(
+                endpoint,
+                headers=_headers(token),
+                params={"org_id": org_id},
+                json=body,
+                timeout=_timeout,
+            )
+        except requests.ConnectionError as e:
+            if attempt == max_retries or not _never_sent(e):
+                raise RuntimeError(f"[{step_name}] {e}") from e
+            response = None
+        finally:
+            limiter.release()
+
+        if response is not None and (
+            response.status_code not in RETRY_STATUS_CODES or attempt == max_retries
+        ):
+            _raise_for_status(response, step_name)
+            return response.json()
+
+        retry_after = retry_after_seconds(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            limiter.pause(retry_after)
+        else:
+            time.sleep(min(60.0, 2 ** attempt) * random.uniform(0.5, 1.0))
+        reason = f"HTTP {response.status_code}" if response is not None else "could not connect"
+        attempt += 1
+        print(f"   Batch {batch_num}: {reason}, retrying (attempt {attempt + 1}/{max_retries + 1})")
+
+
 def create_ingestor_upload_session(
     token: str,
     org_id: int,
     order_id: int,
-    data_urls: list[str],
+    data_urls: Iterable[str],
     session_name: str,
-) -> dict:
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    requests_per_window: int = DEFAULT_REQUESTS_PER_WINDOW,
+    rate_window: float = DEFAULT_RATE_WINDOW,
+    max_retries: int = DEFAULT_BATCH_RETRIES,
+    manifest: IngestorManifest | None = None,
+) -> list[dict]:
     """Create an ingestor upload session with a list of signed URLs.
 
     Raptor Maps will pull each image from the provided URLs and begin
@@ -212,72 +695,103 @@ def create_ingestor_upload_session(
         "upload_session_uuid": "<uuid>"
     }
 
+    Batches are sent concurrently, paced by a rate limiter rather than a fixed
+    pause: up to *max_in_flight* at a time and *requests_per_window* per
+    *rate_window* seconds, slowing down whenever the server sends
+    ``Retry-After``.  Each batch is retried on its own (see ``_submit_batch``).
+
     Parameters
     ----------
-    token        : Bearer JWT.
-    org_id       : Your organization ID.
-    order_id     : Order to associate this upload with.
-    data_urls    : List of signed URLs for the images.
-    session_name : Human-readable label for the upload session.
+    token               : Bearer JWT.
+    org_id              : Your organization ID.
+    order_id            : Order to associate this upload with.
+    data_urls           : Signed URLs for the images; any iterable, read one
+                          batch at a time (e.g. ``iter_urls_from_file``).
+    session_name        : Human-readable label for the upload session.
+    max_in_flight       : Batches outstanding at once (default 4).
+    requests_per_window : Batches started per *rate_window* (default 20).
+    rate_window         : Length of the rate-limit window in seconds (default 60).
+    max_retries         : Retries per batch on 429/503 or a failed connect (default 5).
+    manifest            : Records each accepted batch as it completes.  Batches it
+                          already holds (from an interrupted run) are not sent
+                          again; their earlier sessions are returned instead.
 
     Returns
     -------
     list[dict] — List of response dicts, each containing ``upload_session_id``
-    (and optionally ``upload_session_uuid``).  One entry per batch.
+    (and optionally ``upload_session_uuid``).  One entry per batch, in batch
+    order.
 
     Reference: https://docs.raptormaps.com/reference/apiv2ingestorupload_sessions
     """
     print("\n=== Step 2: Create Ingestor Upload Session ===")
 
-    endpoint = f"{BASE_URL}/v2/ingestor/upload_sessions"
-
-    if len(data_urls) > MAX_URLS_PER_REQUEST:
-        print(
-            f"   WARNING: {len(data_urls)} URLs exceeds the recommended maximum of "
-            f"{MAX_URLS_PER_REQUEST} per request."
-        )
-        print("   Sending in batches...")
+    print(
+        f"   Sending batches of up to {MAX_URLS_PER_REQUEST} URLs ({max_in_flight} at a time, "
+        f"at most {requests_per_window} per {rate_window:g}s)..."
+    )
 
-    # Send in batches if needed
+    limiter = _RateLimiter(requests_per_window, rate_window, max_in_flight)
     results: list[dict] = []
-    for batch_start in range(0, len(data_urls), MAX_URLS_PER_REQUEST):
-        batch = data_urls[batch_start : batch_start + MAX_URLS_PER_REQUEST]
-        batch_num = (batch_start // MAX_URLS_PER_REQUEST) + 1
-
-        body = {
-            "upload_session_name": session_name,
-            "order_id": order_id,
-            "data_url": batch,
-        }
-
-        response = requests.post(
-            endpoint,
-            headers=_headers(token),
-            params={"org_id": org_id},
-            json=body,
-            timeout=60,
-        )
-        _raise_for_status(response, f"Create Ingestor Upload Session (batch {batch_num})")
-        # rate limit between batches; skip sleep after the final batch
-        if batch_start + MAX_URLS_PER_REQUEST < len(data_urls):
-            time.sleep(30)
-
-        result = response.json()
+    # Completed batches are collected in submission order; only a couple of
+    # batches per worker are read and queued ahead, so memory stays flat no
+    # matter how many URLs there are.
+    pending: deque = deque()
+
+    def _send(body: dict, batch_num: int, url_hash: str) -> dict:
+        result = _submit_batch(token, org_id, body, batch_num, limiter, max_retries)
+        if manifest is not None:
+            manifest.record_batch(batch_num, len(body["data_url"]), url_hash, result)
+        return result
+
+    def _collect() -> None:
+        batch_num, batch_size, future, skipped = pending.popleft()
+        result = future.result()
         results.append(result)
-        session_id = result.get("upload_session_id")
+        print(
+            f"   Batch {batch_num}: {batch_size} URLs → "
+            f"session {result.get('upload_session_id')}"
+            f"{' (already submitted, skipped)' if skipped else ''}"
+        )
 
-        if len(data_urls) > MAX_URLS_PER_REQUEST:
-            print(
-                f"   Batch {batch_num}: {len(batch)} URLs → "
-                f"session {session_id}"
-            )
+    total_urls = 0
+    pool = ThreadPoolExecutor(max_workers=max_in_flight)
+    try:
+        for batch_num, batch in enumerate(iter_batches(data_urls), start=1):
+            total_urls += len(batch)
+            url_hash = _batch_hash(batch)
+            previous = manifest.completed.get(batch_num) if manifest is not None else None
+            if previous is not None:
+                if previous["url_hash"] != url_hash:
+                    raise RuntimeError(
+                        f"Batch {batch_num} does not match {manifest.path}; the URL list "
+                        "has changed since the interrupted run"
+                    )
+                future: Future = Future()
+                future.set_result(previous)
+                pending.append((batch_num, len(batch), future, True))
+            else:
+                body = {
+                    "upload_session_name": session_name,
+                    "order_id": order_id,
+                    "data_url": batch,
+                }
+                future = pool.submit(_send, body, batch_num, url_hash)
+                pending.append((batch_num, len(batch), future, False))
+            if len(pending) >= 2 * max_in_flight:
+                _collect()
+        while pending:
+            _collect()
+    finally:
+        # On failure, drop the batches that have not started yet
+        pool.shutdown(wait=True, cancel_futures=True)
 
     print("Ingestor upload session created")
     for r in results:
         print(f"   Session ID   : {r.get('upload_session_id')}")
         print(f"   Session UUID : {r.get('upload_session_uuid', 'N/A')}")
     print(f"   Order ID     : {order_id}")
-    print(f"   Total URLs   : {len(data_urls)}")
+    print(f"   Total URLs   : {total_urls}")
 
     return results
 
@@ -342,8 +856,8 @@ def main() -> int:
         "--urls-file",
         type=str,
         help=(
-            "Path to a text file containing one signed URL per line. "
-            "Blank lines and lines starting with '#' are ignored."
+            "Path to a text file containing one signed URL per line, optionally "
+            "gzip-compressed. Blank lines and lines starting with '#' are ignored."
         ),
     )
     source.add_argument(
@@ -372,7 +886,92 @@ def main() -> int:
         default="upload_session_ids.txt",
         help="Path to write upload session IDs (default: upload_session_ids.txt)",
     )
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help=(
+            "Before submitting, fetch the first byte of every URL and stop if any "
+            "are expired, forbidden or missing (requires httpx)"
+        ),
+    )
+    parser.add_argument(
+        "--preflight-concurrency",
+        type=int,
+        default=DEFAULT_PREFLIGHT_CONCURRENCY,
+        help=f"URLs checked at the same time by --preflight (default: {DEFAULT_PREFLIGHT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default=DEFAULT_MANIFEST_FILE,
+        help=f"File recording each submitted batch (default: {DEFAULT_MANIFEST_FILE})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Continue an interrupted run: batches already recorded in --manifest "
+            "are skipped and their sessions reused"
+        ),
+    )
+    parser.add_argument(
+        "--dedup-urls",
+        action="store_true",
+        help=(
+            "Skip URLs for an object that was already listed "
+            "(compared without the query string, i.e. ignoring the signature)"
+        ),
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help=f"Batches sent to Raptor Maps at the same time (default: {DEFAULT_MAX_IN_FLIGHT})",
+    )
+    parser.add_argument(
+        "--requests-per-window",
+        type=int,
+        default=DEFAULT_REQUESTS_PER_WINDOW,
+        help=(
+            "Batches started per --rate-window seconds "
+            f"(default: {DEFAULT_REQUESTS_PER_WINDOW})"
+        ),
+    )
+    parser.add_argument(
+        "--rate-window",
+        type=float,
+        default=DEFAULT_RATE_WINDOW,
+        help=f"Length of the rate-limit window in seconds (default: {DEFAULT_RATE_WINDOW:g})",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_BATCH_RETRIES,
+        help=(
+            "Times a batch is retried after a 429/503 response or a connection that could not be opened "
+            f"(default: {DEFAULT_BATCH_RETRIES})"
+        ),
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help=f"Connections kept open to the Raptor Maps API (default: {DEFAULT_POOL_SIZE})",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=DEFAULT_CONNECT_TIMEOUT,
+        help=f"Seconds to wait for an API connection (default: {DEFAULT_CONNECT_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=DEFAULT_READ_TIMEOUT,
+        help=f"Seconds to wait for an API response (default: {DEFAULT_READ_TIMEOUT})",
+    )
     args = parser.parse_args()
+    configure_session(args.pool_size, args.connect_timeout, args.read_timeout)
 
     # ── Read environment variables ────────────────────────────────────────
     client_id = os.environ.get("RM_API_CLIENT_ID")
@@ -396,42 +995,91 @@ def main() -> int:
     org_id = int(org_id_str)  
 
     # ── Load signed URLs ─────────────────────────────────────────────────
+    # URLs are streamed from the file straight into the batch loop rather
+    # than loaded up front, so only the first one is read here
+    def read_urls() -> Iterator[str]:
+        # A fresh pass over the URLs each time (pre-flight, then submission)
+        return iter_urls_from_file(args.urls_file) if args.urls_file else iter(args.urls)
+
     if args.urls_file:
-        print(f"Loading signed URLs from {args.urls_file} ...")
-        signed_urls = load_urls_from_file(args.urls_file)
-        if not signed_urls:
+        print(f"Reading signed URLs from {args.urls_file} ...")
+        if next(read_urls(), None) is None:
             print(f"ERROR: No URLs found in {args.urls_file}")
             print("   The file should contain one signed URL per line.")
             return 1
+        url_count = "streamed from file"
     else:
-        signed_urls = args.urls
+        url_count = str(len(args.urls))
 
-    print(f"   Loaded {len(signed_urls)} signed URL(s)")
+    signed_urls = read_urls()
+    deduplicator = UrlDeduplicator() if args.dedup_urls else None
+    if deduplicator is not None:
+        signed_urls = deduplicator.filter(signed_urls)
 
     # ── Print run summary ─────────────────────────────────────────────────
     print("\nRaptor Maps — Ingestor Upload Flow")
     print("=" * 55)
     print(f"   Org ID        : {org_id}")
-    print(f"   Signed URLs   : {len(signed_urls)}")
+    print(f"   Signed URLs   : {url_count}")
     print(f"   Order ID      : {args.order_id}")
     print(f"   Session Name  : {args.session_name}")
     print("=" * 55)
 
     try:
+        manifest = IngestorManifest.open(
+            args.manifest, args.order_id, args.session_name, args.resume,
+        )
+        if args.resume:
+            print(f"   Resuming      : {len(manifest.completed)} batch(es) already submitted")
+
+        # Optional: check every URL can be downloaded before sending any
+        if args.preflight:
+            print("\n=== Pre-flight: Check Signed URLs ===")
+            urls = read_urls()
+            if args.dedup_urls:
+                urls = UrlDeduplicator().filter(urls)
+            report = preflight_urls(urls, args.preflight_concurrency)
+            report.print()
+            if report.blocking:
+                raise RuntimeError(
+                    f"{report.blocking} URL(s) cannot be downloaded; re-sign or remove "
+                    "them, or run without --preflight to submit anyway"
+                )
+
         # Step 1: Authenticate
         token = get_api_token(client_id, client_secret)  # type: ignore[arg-type]
 
         # Step 2: Create Ingestor Upload Session (sends signed URLs to Raptor Maps)
-        results = create_ingestor_upload_session(
-            token=token,
-            org_id=org_id,
-            order_id=args.order_id,
-            data_urls=signed_urls,
-            session_name=args.session_name,
-        )
+        try:
+            results = create_ingestor_upload_session(
+                token=token,
+                org_id=org_id,
+                order_id=args.order_id,
+                data_urls=signed_urls,
+                session_name=args.session_name,
+                max_in_flight=args.max_in_flight,
+                requests_per_window=args.requests_per_window,
+                rate_window=args.rate_window,
+                max_retries=args.max_retries,
+                manifest=manifest,
+            )
+        except BaseException:
+            # Keep the sessions that were created before the failure
+            submitted = manifest.results()
+            if submitted:
+                write_session_ids(submitted, args.output_file)
+                print(
+                    f"   {len(submitted)} batch(es) were submitted before the failure; "
+                    "rerun with --resume to send only the rest."
+                )
+            raise
+
+        if deduplicator is not None:
+            print(f"   Duplicates   : {deduplicator.skipped} skipped")
 
         # Step 3: Write session IDs to file
         write_session_ids(results, args.output_file)
+        manifest.finish()
 
         print("\n" + "=" * 55)
         print("Ingestor upload session created successfully!")